@@ -0,0 +1 @@
+# Benchmark suite: synthetic BOSS workbooks (generate_boss) and timings (run)
@@ -0,0 +1,144 @@
+import argparse
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+from openpyxl import Workbook, load_workbook
+
+from eopd.boss import BOSS_HEADERS, BOSS_SCHEMA, resolve_boss_columns
+
+# Synthetic BOSS raw data workbooks for benchmarking: 4 title rows, a header row and
+# 217 columns, with the columns the processor keeps (eopd.boss.BOSS_HEADERS) filled
+# with plausible noon report values and every other column with numeric filler.
+#   python -m benchmarks.generate_boss --rows 1000 10000 100000
+
+N_COLUMNS = 217
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+VESSELS = ["Ocean Pioneer", "Nordic Star", "Cape Horizon", "Pacific Dawn", "Atlantic Crest",
+           "Baltic Wave", "Coral Bay", "Golden Harvest", "Silver Fjord", "Iron Duke"]
+PORTS = ["SGSIN", "NLRTM", "CNQIN", "BRTUB", "AUPHE", "ZARCB", "USMSY", "JPKSM", "INVTZ", "KRPUS"]
+
+# Degrees/minutes position strings as reported, e.g. "12 34.5 N"
+def _positions(rng, n, limit, hemispheres):
+    value = rng.uniform(-limit, limit, n)
+    degrees = np.abs(value).astype(int)
+    minutes = np.round((np.abs(value) - degrees) * 60, 1)
+    hemisphere = np.where(value >= 0, hemispheres[0], hemispheres[1])
+    return [f"{d:02d} {m:04.1f} {h}" for d, m, h in zip(degrees, minutes, hemisphere)]
+
+# Column values for n reports, keyed by column position
+def make_boss_columns(n, seed=0):
+    rng = np.random.default_rng(seed)
+    vessel = VESSELS[seed % len(VESSELS)]
+
+    speed = rng.normal(12.0, 1.2, n).clip(6, 16)
+    laden = rng.random(n) < 0.55
+    disp = np.where(laden, rng.normal(95000, 4000, n), rng.normal(50000, 3000, n))
+    me_cons = 0.9 * np.exp(0.27 * speed) * (disp / 75000) ** 0.66 * rng.normal(1, 0.05, n)
+    ae_cons = rng.normal(2.5, 0.3, n).clip(1, None)
+    blr_cons = rng.choice([0.0, 0.0, 0.3], n)
+    steaming_hrs = rng.choice([24.0, 24.0, 24.0, 23.0, 25.0, 12.0, 6.0], n)
+    draft_f = np.where(laden, rng.normal(13.5, 0.4, n), rng.normal(6.5, 0.5, n))
+    draft_a = draft_f + rng.normal(0.6, 0.3, n)
+    start = datetime(2023, 1, 1, 12)
+
+    columns = {i: np.round(rng.normal(100, 30, n), 3) for i in range(N_COLUMNS)}  # Filler
+    columns.update({
+        0: np.arange(1, n + 1),
+        1: [vessel] * n,
+        2: [f"{seed:02d}{v:03d}" for v in np.arange(n) // 30 + 1],
+        3: rng.choice(PORTS, n),
+        4: rng.choice(PORTS, n),
+        5: [start + timedelta(days=int(d)) for d in range(n)],
+        8: np.where(laden, "Laden", "Ballast"),
+        9: _positions(rng, n, 60, "NS"),
+        10: _positions(rng, n, 179, "EW"),
+        12: rng.choice(["Noon", "Noon", "Noon", "Arrival", "Departure"], n),
+        23: steaming_hrs,
+        24: np.round(speed, 2),
+        25: np.round(speed * steaming_hrs, 1),
+        26: rng.integers(0, 9, n),
+        27: rng.integers(0, 36, n) * 10,
+        28: rng.integers(0, 7, n),
+        54: np.round(me_cons + ae_cons + blr_cons, 2),
+        55: np.round(me_cons, 2),
+        56: np.round(ae_cons, 2),
+        57: blr_cons,
+        58: np.round(me_cons / (speed * 24), 4),
+        183: np.round(disp, 0),
+        185: np.round(np.where(laden, disp - 22000, 0), 0),
+        186: np.round(np.where(laden, 2000, 30000) + rng.normal(0, 500, n), 0),
+        188: np.round(draft_f, 2),
+        189: np.round(draft_a, 2),
+        191: np.round(rng.normal(55, 10, n).clip(20, 95), 1),
+        192: np.round(speed * 6.2 + rng.normal(0, 1, n), 1),
+        193: np.round(rng.normal(4, 3, n), 2),
+        194: np.round(speed * steaming_hrs * rng.normal(1, 0.02, n), 1),
+        196: np.round(speed + rng.normal(0, 0.4, n), 2),
+        204: np.round(speed + rng.normal(0, 0.5, n), 2),
+        205: np.round(speed + rng.normal(0, 0.3, n), 2),
+        206: rng.integers(0, 9, n),
+        207: rng.integers(0, 36, n) * 10,
+        208: np.round(rng.gamma(2, 0.8, n), 1),
+        209: rng.integers(0, 36, n) * 10,
+        210: np.round(rng.normal(0, 0.4, n), 2),
+        211: np.round(rng.uniform(0, 24, n), 1),
+        212: np.round(rng.uniform(0, 24, n), 1),
+        213: np.round(rng.uniform(0, 6, n), 1),
+        215: np.round(rng.gamma(2, 0.8, n), 1),
+        216: np.round(rng.normal(1.6, 0.3, n), 2),
+    })
+    return columns
+
+# Write one synthetic BOSS workbook with n report rows to path
+def write_boss_workbook(path, n, seed=0):
+    columns = make_boss_columns(n, seed)
+    header = [BOSS_HEADERS.get(i, f"Field {i}") for i in range(N_COLUMNS)]
+    values = [columns[i].tolist() if isinstance(columns[i], np.ndarray) else columns[i] for i in range(N_COLUMNS)]
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("BOSS Raw Data")
+    ws.append(["BOSS Raw Data Export"])
+    ws.append([f"Generated {datetime.now():%d-%b-%Y %H:%M}"])
+    ws.append([])
+    ws.append([])
+    ws.append(header)
+    for row in zip(*values):
+        ws.append(row)
+    wb.save(path)
+
+# Whether a cached workbook's header row still matches the schema (it changes with the schema)
+def _header_matches(path):
+    wb = load_workbook(path, read_only=True)
+    try:
+        row = BOSS_SCHEMA["title_rows"] + 1
+        header = next(wb.worksheets[0].iter_rows(min_row=row, max_row=row, values_only=True), ())
+    finally:
+        wb.close()
+    try:
+        resolve_boss_columns(header)
+    except ValueError:
+        return False
+    return True
+
+# Path of the cached workbook with n rows, generating it first if needed
+def boss_workbook(n, data_dir=DEFAULT_DATA_DIR, seed=0):
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"boss_{n}_rows_seed{seed}.xlsx")
+    if not os.path.exists(path) or not _header_matches(path):
+        write_boss_workbook(path, n, seed)
+    return path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic 217-column BOSS workbooks")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000], help="Report rows per workbook")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Output directory (default: benchmarks/data)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed; also picks the vessel name")
+    args = parser.parse_args(argv)
+
+    for n in args.rows:
+        print(boss_workbook(n, args.data_dir, args.seed))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.generate_boss import DEFAULT_DATA_DIR, boss_workbook
+from eopd.boss import derive_boss_columns, export_to_excel, filter_boss_dataframe, read_boss_excel
+from eopd.displacement import normalize_consumption
+from eopd.fitting import CurveAccumulator, cross_validate_curves, fit_exponential, fit_fleet_curves, fit_polynomial
+from eopd.navigation import calculate_stw
+from eopd.positions import check_reported_distance
+from eopd.sfoc import calculate_cons_day, calculate_sfoc
+from eopd.wind import calculate_true_wind
+
+# Benchmarks for the BOSS pipeline stages and the calculation kernels. Results are written
+# as JSON so runs from different versions can be compared:
+#   python -m benchmarks.run --output before.json
+#   python -m benchmarks.run --compare before.json
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# Best and median wall time of fn over repeat calls; setup() runs untimed before each call
+def time_call(fn, repeat, setup=None):
+    times = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - start)
+    return {"best_s": min(times), "median_s": statistics.median(times), "repeat": repeat}
+
+# BOSS pipeline stages on a synthetic n-row workbook. Column selection and renaming happen
+# inside read_boss_excel and dropping is no longer a separate step, so "read" covers all three;
+# "filter" is filter_boss_dataframe (steaming-hours filter, reorder and 2-decimal rounding).
+def boss_benchmarks(n, repeat, data_dir, include_full_read):
+    with open(boss_workbook(n, data_dir), "rb") as f:
+        data = f.read()
+
+    results = {}
+    if include_full_read:
+        # Reference: the original full-width pd.read_excel ingestion
+        results["boss.read_full_width"] = time_call(lambda: pd.read_excel(io.BytesIO(data), skiprows=4), repeat)
+    results["boss.read"] = time_call(lambda: read_boss_excel(data), repeat)
+
+    selected = read_boss_excel(data)
+    results["boss.derive"] = time_call(derive_boss_columns, repeat, setup=lambda: (selected.copy(),))
+
+    derived = derive_boss_columns(selected.copy())
+    results["boss.filter"] = time_call(lambda: filter_boss_dataframe(derived, 22), repeat)
+
+    cleaned = filter_boss_dataframe(derived, 22)
+    results["boss.export"] = time_call(lambda: export_to_excel(cleaned), repeat)
+    return results
+
+# Calculation kernels over n reports / data points
+def kernel_benchmarks(n, repeat):
+    rng = np.random.default_rng(0)
+    angle_a, angle_b = rng.uniform(0, 360, n), rng.uniform(0, 360, n)
+    speed, current = rng.uniform(8, 16, n), rng.uniform(0, 3, n)
+    wind = rng.uniform(0, 40, n)
+    me_cons = 0.9 * np.exp(0.27 * speed) * rng.normal(1, 0.05, n)
+    disp = rng.uniform(40000, 100000, n)
+    power = rng.uniform(4000, 12000, n)
+    # Up to 300 vessels x 2 conditions
+    fleet = pd.DataFrame({"Vessel Name": np.arange(n) % 300, "Condition": rng.choice(["Laden", "Ballast"], n), "SOG": speed, "ME Cons/day": me_cons})
+    # Noon positions of the same vessels, 20 voyages each
+    lat, lon = rng.uniform(-60, 60, n), rng.uniform(-179, 179, n)
+    positions = pd.DataFrame({
+        "Vessel Name": np.arange(n) % 300, "Voyage No": rng.integers(0, 20, n),
+        "Date/Time": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.permutation(n), unit="h"),
+        "Lat": [f"{int(abs(v))} {abs(v) % 1 * 60:04.1f} {'N' if v >= 0 else 'S'}" for v in lat],
+        "Long": [f"{int(abs(v))} {abs(v) % 1 * 60:04.1f} {'E' if v >= 0 else 'W'}" for v in lon],
+        "DMG": speed * 24,
+    })
+
+    return {
+        "navigation.calculate_stw": time_call(lambda: calculate_stw(angle_a, speed, angle_b, current), repeat),
+        "wind.calculate_true_wind": time_call(lambda: calculate_true_wind(wind, angle_a, speed, angle_b), repeat),
+        "sfoc.calculate_cons_day": time_call(lambda: calculate_cons_day(170.0, power), repeat),
+        "sfoc.calculate_sfoc": time_call(lambda: calculate_sfoc(me_cons, power), repeat),
+        "displacement.normalize_consumption": time_call(lambda: normalize_consumption(me_cons, disp, 75000, 0.66), repeat),
+        "fitting.fit_exponential": time_call(lambda: fit_exponential(speed, me_cons), repeat),
+        "fitting.fit_polynomial_deg3": time_call(lambda: fit_polynomial(speed, me_cons, 3), repeat),
+        "fitting.curve_accumulator_deg3": time_call(lambda: CurveAccumulator("Polynomial", 3).add(speed, me_cons).coefficients(), repeat),
+        "fitting.cross_validate_curves": time_call(lambda: cross_validate_curves(speed, me_cons, k=5), repeat),
+        "fitting.fit_fleet_curves": time_call(lambda: fit_fleet_curves(fleet, min_reports=3, max_workers=1), repeat),
+        "positions.check_reported_distance": time_call(lambda: check_reported_distance(positions), repeat),
+    }
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=os.path.dirname(__file__))
+        return out.stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+def run(boss_sizes, kernel_sizes, repeat, data_dir, include_full_read):
+    results = []
+    for n in kernel_sizes:
+        for name, timing in kernel_benchmarks(n, repeat).items():
+            results.append({"name": name, "size": n, **timing})
+            print(f"{name:<40} n={n:<8} best {timing['best_s'] * 1000:10.3f} ms", flush=True)
+    for n in boss_sizes:
+        for name, timing in boss_benchmarks(n, max(1, repeat // 3), data_dir, include_full_read).items():
+            results.append({"name": name, "size": n, **timing})
+            print(f"{name:<40} n={n:<8} best {timing['best_s'] * 1000:10.3f} ms", flush=True)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+# Print best-time ratios against an earlier results file; ratios above 1 + threshold are regressions
+def compare(current, baseline, threshold):
+    previous = {(r["name"], r["size"]): r["best_s"] for r in baseline["results"]}
+    regressions = 0
+    print(f"\nvs {baseline['meta']['commit']} ({baseline['meta']['timestamp']}):")
+    for r in current["results"]:
+        key = (r["name"], r["size"])
+        if key not in previous:
+            continue
+        ratio = r["best_s"] / previous[key]
+        flag = "REGRESSION" if ratio > 1 + threshold else "faster" if ratio < 1 - threshold else ""
+        regressions += flag == "REGRESSION"
+        print(f"{r['name']:<40} n={r['size']:<8} {ratio:6.2f}x {flag}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the BOSS pipeline and calculation kernels")
+    parser.add_argument("--boss-sizes", type=int, nargs="*", default=[1000, 10000], help="Workbook rows for the BOSS pipeline (100000 takes minutes)")
+    parser.add_argument("--kernel-sizes", type=int, nargs="*", default=[1000, 10000, 100000], help="Array sizes for the kernels")
+    parser.add_argument("--repeat", type=int, default=7, help="Timed calls per kernel benchmark (BOSS stages use a third)")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Where synthetic workbooks are cached")
+    parser.add_argument("--full-read", action="store_true", help="Also time the original full-width pd.read_excel")
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/<timestamp>-<commit>.json)")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    report = run(args.boss_sizes, args.kernel_sizes, args.repeat, args.data_dir, args.full_read)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{report['meta']['commit']}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,104 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+from benchmarks.run import RESULTS_DIR, _git_commit, compare
+
+# Cold-start benchmark: time to first render of each page in a fresh Python process, as
+# after a container restart. Streamlit itself is imported before the clock starts (the
+# server has it loaded before any page runs), so the time covers the page's own imports
+# and its first script run. Results use the same JSON layout as benchmarks.run:
+#   python -m benchmarks.startup --output before.json
+#   python -m benchmarks.startup --compare before.json
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Libraries whose import dominates start-up; reported when a page's first render loaded them
+HEAVY_MODULES = ["pandas", "matplotlib", "openpyxl", "pyarrow"]
+
+# Runs in the child process: prints seconds for the first and a second (warm) run of the page
+_CHILD = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=120).run()
+first = time.perf_counter() - start
+start = time.perf_counter()
+AppTest.from_file(sys.argv[1], default_timeout=120).run()
+warm = time.perf_counter() - start
+heavy = [name for name in sys.argv[2:] if name in sys.modules]
+print(json.dumps({"first_s": first, "warm_s": warm, "heavy_modules": heavy, "exception": bool(at.exception)}))
+"""
+
+def app_pages():
+    return sorted(glob.glob(os.path.join(ROOT, "*.py"))) + sorted(glob.glob(os.path.join(ROOT, "pages", "*.py")))
+
+# Best and median time to first render of one page over repeat fresh processes
+def time_page(path, repeat):
+    env = {**os.environ, "PYTHONPATH": ROOT}
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", _CHILD, path, *HEAVY_MODULES], capture_output=True, text=True, cwd=ROOT, env=env, check=True)
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    first = [run["first_s"] for run in runs]
+    return {
+        "best_s": min(first),
+        "median_s": statistics.median(first),
+        "warm_s": min(run["warm_s"] for run in runs),
+        "repeat": repeat,
+        "heavy_modules": runs[-1]["heavy_modules"],
+        "exception": runs[-1]["exception"],
+    }
+
+def run(repeat):
+    results = []
+    for path in app_pages():
+        page = os.path.splitext(os.path.basename(path))[0]
+        timing = time_page(path, repeat)
+        results.append({"name": f"startup.{page}", "size": 1, **timing})
+        heavy = ", ".join(timing["heavy_modules"]) or "-"
+        print(f"{page:<32} first {timing['best_s'] * 1000:8.0f} ms  warm {timing['warm_s'] * 1000:8.0f} ms  loads {heavy}", flush=True)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "machine": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark time to first render of every page")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh processes per page")
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/startup-<timestamp>-<commit>.json)")
+    parser.add_argument("--compare", help="Earlier startup results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    report = run(args.repeat)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"startup-{datetime.now():%Y%m%d-%H%M%S}-{report['meta']['commit']}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
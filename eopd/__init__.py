@@ -0,0 +1,6 @@
+# Streamlit-free core of the EOPD Tool House: the calculation kernels behind each page
+# (navigation, wind, sfoc, displacement, fitting), the BOSS cleanup pipeline (boss) with
+# its data-quality rules (quality), position checks (positions) and background job queue
+# (jobs), the fleet store (store) and the polar diagrams (render). Pages import from here,
+# and so can scripts and batch jobs; python -m eopd runs the headless CLI (cli). Only
+# eopd.ui imports Streamlit.
@@ -0,0 +1,7 @@
+import sys
+
+from eopd.cli import main
+
+# Guarded so worker processes started with "spawn" don't re-run the CLI
+if __name__ == "__main__":
+    sys.exit(main())
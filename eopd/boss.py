@@ -0,0 +1,384 @@
+import hashlib
+import io
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import reduce
+from operator import add, itemgetter, mul
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.dataframe import dataframe_to_rows
+
+from eopd.instrument import StageRecorder
+from eopd.workers import default_workers
+
+# Declarative layout of a BOSS raw data export, versioned so a changed export gets a new
+# schema rather than edits scattered over the transform. Compiled once (compile_boss_schema)
+# into the column take, dtypes and derived columns used by read_boss_excel and friends.
+#   title_rows: rows above the header row
+#   width:      columns in the header row; any other width means the layout changed
+#   columns:    output name -> (source, dtype). source is (column position, expected header text),
+#               or just the header text to look the column up by; dtype None leaves it inferred.
+#               Other columns are never read.
+#   derived:    output name -> (operation, input columns), calculated after reading
+#   output:     column order of the cleaned report table
+#   text:       text columns of the cleaned report table; everything else except Date/Time is numeric
+BOSS_SCHEMA_V1 = {
+    "version": 1,
+    "title_rows": 4,
+    "width": 217,
+    "columns": {
+        "S.No": ((0, "S.No"), None),
+        "Vessel Name": ((1, "Vessel Name"), "str"),
+        "Voyage No": ((2, "Voyage No"), None),
+        "From": ((3, "From"), "str"),
+        "To": ((4, "To"), "str"),
+        "Date/Time": ((5, "Date/Time"), None),
+        "Condition": ((8, "Condition"), "str"),
+        "Lat": ((9, "Lat"), "str"),
+        "Long": ((10, "Long"), "str"),
+        "Report Type": ((12, "Report Type"), "str"),
+        "Steaming Hrs": ((23, "Steaming Hrs"), "float64"),
+        "SOG": ((24, "SOG"), "float64"),
+        "DMG (Rep)": ((25, "DMG"), None),
+        "BF (Rep)": ((26, "BF (Rep)"), None),
+        "Wind Dir (R) (Rep)": ((27, "Wind Dir (R) (Rep)"), None),
+        "Sea State (R)": ((28, "Sea State (R)"), None),
+        "ME Cons/day": ((55, "ME Cons/day"), "float64"),
+        "AE Cons/day": ((56, "AE Cons/day"), "float64"),
+        "Blr Cons/day": ((57, "Blr Cons/day"), "float64"),
+        "ME - MT/NM": ((58, "ME - MT/NM"), None),
+        "Disp": ((183, "Disp"), None),
+        "Cargo wt": ((185, "Cargo wt"), None),
+        "Ballast": ((186, "Ballast"), None),
+        "Draft F": ((188, "Draft F"), "float64"),
+        "Draft A": ((189, "Draft A"), "float64"),
+        "ME Load": ((191, "ME Load"), None),
+        "RPM": ((192, "RPM"), None),
+        "Slip%": ((193, "Slip%"), None),
+        "DTW": ((194, "DTW"), None),
+        "STW (HC)": ((196, "STW (HC)"), None),
+        "STW (Rep)": ((204, "STW (Rep)"), None),
+        "CSS": ((205, "CSS"), None),
+        "BF (HC)": ((206, "BF (HC)"), None),
+        "Wind Dir (R) (HC)": ((207, "Wind Dir (R) (HC)"), None),
+        "Sig wave ht (HC)": ((208, "Sig wave ht (HC)"), None),
+        "Sig wave Dir (HC)": ((209, "Sig wave Dir (HC)"), None),
+        "CF (HC)": ((210, "CF (HC)"), None),
+        "AE 1 hrs": ((211, "AE 1 hrs"), None),
+        "AE 2 Hrs": ((212, "AE 2 Hrs"), None),
+        "AE 3 hrs": ((213, "AE 3 hrs"), None),
+        "Sig wave ht (Rep)": ((215, "Sig wave ht (Rep)"), None),
+        "Scav Air Press": ((216, "Scav Air Press"), None),
+    },
+    # DMG and Total Cons/day are also in the export (positions 25 and 54) but are recalculated.
+    # The reported DMG is read as DMG (Rep) for the position cross-check only.
+    "derived": {
+        "Avg Draft": ("mean", ["Draft F", "Draft A"]),
+        "DMG": ("product", ["Steaming Hrs", "SOG"]),
+        "Total Cons/day": ("sum", ["ME Cons/day", "AE Cons/day", "Blr Cons/day"]),
+    },
+    "output": [
+        "S.No", "Vessel Name", "Voyage No", "From", "To", "Date/Time", "Condition", "Lat", "Long",
+        "Report Type", "Steaming Hrs", "DMG", "DTW", "SOG", "STW (HC)", "STW (Rep)", "CSS", "CF (HC)",
+        "Total Cons/day", "ME Cons/day", "AE Cons/day", "Blr Cons/day", "ME - MT/NM", "Disp",
+        "Cargo wt", "Ballast", "Draft F", "Draft A", "Avg Draft", "BF (Rep)", "BF (HC)",
+        "Wind Dir (R) (Rep)", "Wind Dir (R) (HC)", "Sea State (R)", "Sig wave ht (Rep)", "Sig wave ht (HC)",
+        "Sig wave Dir (HC)", "ME Load", "RPM", "Slip%", "AE 1 hrs", "AE 2 Hrs", "AE 3 hrs", "Scav Air Press"
+    ],
+    "text": ["Vessel Name", "Voyage No", "From", "To", "Condition", "Lat", "Long", "Report Type"],
+}
+
+# Operations available to derived columns, applied left to right over the input columns
+_DERIVED_OPERATIONS = {
+    "sum": lambda columns: reduce(add, columns),
+    "product": lambda columns: reduce(mul, columns),
+    "mean": lambda columns: reduce(add, columns) / len(columns),
+}
+
+# Check a schema and resolve what can be resolved without a workbook. Raises ValueError for
+# schemas that refer to unknown operations or columns, so mistakes fail at import.
+def compile_boss_schema(schema):
+    columns = schema["columns"]
+    for name, (source, _) in columns.items():
+        positional = isinstance(source, tuple) and len(source) == 2 and isinstance(source[0], int) and isinstance(source[1], str)
+        if not (isinstance(source, str) or positional and 0 <= source[0] < schema["width"]):
+            raise ValueError(f"BOSS schema v{schema['version']}: source of {name} must be (position, header text) or header text, got {source!r}")
+
+    known = set(columns)
+    derived = []
+    for name, (operation, inputs) in schema["derived"].items():
+        if operation not in _DERIVED_OPERATIONS:
+            raise ValueError(f"BOSS schema v{schema['version']}: unknown operation {operation!r} for {name}")
+        missing = [col for col in inputs if col not in known]
+        if missing:
+            raise ValueError(f"BOSS schema v{schema['version']}: {name} needs unknown columns {missing}")
+        derived.append((name, _DERIVED_OPERATIONS[operation], list(inputs)))
+        known.add(name)
+
+    missing = [col for col in schema["output"] if col not in known]
+    if missing:
+        raise ValueError(f"BOSS schema v{schema['version']}: output columns {missing} are neither read nor derived")
+
+    return {
+        "version": schema["version"],
+        "title_rows": schema["title_rows"],
+        "width": schema["width"],
+        "names": list(columns),
+        "sources": [source for source, _ in columns.values()],
+        "dtypes": {name: dtype for name, (_, dtype) in columns.items() if dtype is not None},
+        "derived": derived,
+        "output": list(schema["output"]),
+        "text": list(schema["text"]),
+    }
+
+BOSS_SCHEMA = compile_boss_schema(BOSS_SCHEMA_V1)
+
+# Column order and text columns of the cleaned report table (used by the fleet store)
+BOSS_OUTPUT_COLUMNS = BOSS_SCHEMA["output"]
+BOSS_TEXT_COLUMNS = BOSS_SCHEMA["text"]
+
+# Source positions of the columns located by position, and their output names and expected header text
+BOSS_COLUMNS = {source[0]: name for name, source in zip(BOSS_SCHEMA["names"], BOSS_SCHEMA["sources"]) if isinstance(source, tuple)}
+BOSS_HEADERS = {source[0]: source[1] for source in BOSS_SCHEMA["sources"] if isinstance(source, tuple)}
+
+# Header cell text for comparing with a schema: whitespace runs collapsed, case ignored
+def _header_text(value):
+    return " ".join(str(value).split()).casefold() if value is not None else ""
+
+# Positions of the schema's columns in a workbook with this header row. Raises ValueError
+# when the layout doesn't match (width, a positional column under another header, or a
+# header looked up by text missing or repeated), so a changed export fails here instead of
+# reading the wrong columns.
+def resolve_boss_columns(header, schema=BOSS_SCHEMA):
+    header = list(header)
+    while header and header[-1] in (None, ""):  # Trailing blank cells aren't columns
+        header.pop()
+    if len(header) != schema["width"]:
+        raise ValueError(f"BOSS layout changed: expected {schema['width']} columns for schema v{schema['version']}, found {len(header)}")
+
+    texts = [_header_text(value) for value in header]
+    positions = []
+    moved = []
+    for name, source in zip(schema["names"], schema["sources"]):
+        if isinstance(source, str):
+            matches = [i for i, text in enumerate(texts) if text == _header_text(source)]
+            if len(matches) != 1:
+                raise ValueError(f"BOSS layout changed: header {source!r} for {name} found {len(matches)} times, expected once")
+            positions.append(matches[0])
+        else:
+            position, expected = source
+            if texts[position] != _header_text(expected):
+                moved.append(f"column {position + 1} is {header[position]!r}, expected {expected!r} ({name})")
+            positions.append(position)
+    if moved:
+        raise ValueError(f"BOSS layout changed for schema v{schema['version']}: {'; '.join(moved)}")
+    return positions
+
+# Repetitive text columns of the cleaned report table, held as categoricals by compact_boss_dataframe
+BOSS_CATEGORY_COLUMNS = ["Vessel Name", "Voyage No", "Condition", "Report Type", "From", "To"]
+
+# Read only the schema's columns of a raw BOSS workbook, streaming rows with a read-only
+# openpyxl reader so parse time and memory follow the ~45 kept columns rather than the full
+# sheet width. The header row is checked against the schema first (resolve_boss_columns);
+# columns given a dtype that doesn't fit their values raise ValueError naming the column.
+def read_boss_excel(data, schema=BOSS_SCHEMA):
+    wb = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    try:
+        sheet = wb.worksheets[0]
+        header = next(sheet.iter_rows(min_row=schema["title_rows"] + 1, max_row=schema["title_rows"] + 1, values_only=True), ())
+        positions = resolve_boss_columns(header, schema)
+        pick = itemgetter(*positions)
+        rows = sheet.iter_rows(min_row=schema["title_rows"] + 2, max_col=max(positions) + 1, values_only=True)
+        records = [pick(row) for row in rows]
+    finally:
+        wb.close()
+
+    # One frame with the output names, then one cast of the typed columns
+    df = pd.DataFrame.from_records(records, columns=schema["names"])
+    try:
+        return df.astype(schema["dtypes"])
+    except (TypeError, ValueError):
+        for name, dtype in schema["dtypes"].items():  # Find the column to report
+            try:
+                df[name].astype(dtype)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"BOSS layout changed: {name} (schema v{schema['version']}) isn't {dtype}: {e}") from None
+        raise
+
+# Add the schema's derived columns to the columns read by read_boss_excel
+def derive_boss_columns(df, schema=BOSS_SCHEMA):
+    for name, operation, inputs in schema["derived"]:
+        df[name] = operation([df[col] for col in inputs])
+    return df
+
+# Filter, reorder and round a derived BOSS DataFrame into the cleaned report table.
+# Doesn't modify df, so cached frames can be re-filtered with another threshold.
+def filter_boss_dataframe(df, min_steaming_hrs, schema=BOSS_SCHEMA):
+    return screen_boss_dataframe(df, min_steaming_hrs, schema=schema)[0]
+
+# filter_boss_dataframe with data-quality rules (see eopd.quality) on top of the steaming-hours
+# filter. Returns the cleaned table and the rejection summary, in which the steaming-hours
+# filter is the first rule; rules are checked on the unrounded values.
+# With dmg_tolerance_pct, the reported DMG (DMG (Rep), not the recalculated DMG) is
+# cross-checked against the distance between consecutive positions of each voyage
+# (eopd.positions.check_reported_distance) before any report is filtered out, and the
+# DMG (Rep), Position Dist (NM) and DMG Mismatch columns are added to the table (and can be
+# used in rules).
+def screen_boss_dataframe(df, min_steaming_hrs, rules=(), schema=BOSS_SCHEMA, dmg_tolerance_pct=None):
+    from eopd.quality import evaluate_rules
+
+    output = schema["output"]
+    if dmg_tolerance_pct is not None:
+        from eopd.positions import check_reported_distance
+
+        check = check_reported_distance(df, dmg_tolerance_pct, distance_column="DMG (Rep)")
+        df = pd.concat([df, check], axis=1)
+        output = output + ["DMG (Rep)", *check.columns]
+
+    steaming = {"name": f"Steaming Hrs >= {min_steaming_hrs:g}", "kind": "range", "column": "Steaming Hrs", "min": min_steaming_hrs, "allow_missing": False}
+    keep, summary = evaluate_rules(df, [steaming, *rules])
+
+    # Filter and output column order in a single take
+    df_reordered = df.loc[keep, output]
+
+    # Limit decimal places to 2 for all numeric columns
+    df_reordered = df_reordered.round({col: 2 for col in output if pd.api.types.is_numeric_dtype(df_reordered[col]) and not pd.api.types.is_bool_dtype(df_reordered[col])})
+    return df_reordered, summary
+
+# Transform the columns read by read_boss_excel into the cleaned report table
+def transform_boss_dataframe(df, min_steaming_hrs, schema=BOSS_SCHEMA):
+    return filter_boss_dataframe(derive_boss_columns(df, schema), min_steaming_hrs, schema)
+
+# Smallest dtype holding a numeric column without changing it at 2 decimals: an integer type
+# for whole numbers without gaps, else float32 when every value rounds back to the same
+# 2 decimals, else the column as it is
+def _compact_numeric(values):
+    array = values.to_numpy(dtype="float64")
+    if len(array) and np.isfinite(array).all() and (np.abs(array) < 2**31).all() and (array == np.round(array)).all():
+        return pd.to_numeric(pd.Series(array.astype("int64"), index=values.index), downcast="integer")
+    narrow = array.astype("float32")
+    if np.array_equal(np.round(narrow.astype("float64"), 2), np.round(array, 2), equal_nan=True):
+        return pd.Series(narrow, index=values.index)
+    return values
+
+# Shrink a cleaned report table for keeping in memory. Repetitive text columns become
+# categoricals and numeric columns are downcast (see _compact_numeric). Use the table as
+# returned by filter_boss_dataframe for the xlsx export and the fleet store, which expect
+# the full float64 values.
+def compact_boss_dataframe(df):
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        if col in BOSS_CATEGORY_COLUMNS:
+            values = values.astype("category")
+        elif pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            values = _compact_numeric(values)
+        columns[col] = values
+    return pd.DataFrame(columns, index=df.index)
+
+# Bytes held by a DataFrame, counting the Python strings in object / str columns
+def memory_bytes(df):
+    return int(df.memory_usage(deep=True).sum())
+
+# Auto-fit column widths computed from the DataFrame with vectorized string lengths
+def column_widths(df):
+    widths = []
+    for col in df.columns:
+        values = df[col]
+        if pd.api.types.is_datetime64_any_dtype(values):
+            max_length = len("YYYY-MM-DD HH:MM:SS") if values.notna().any() else len("nan")  # Written as datetimes
+        else:
+            max_length = values.astype(str).str.len().max() if len(values) else 0
+        max_length = max(max_length, len(str(col)))
+        widths.append((max_length + 2) * 1.2)  # Add a little extra space
+    return widths
+
+# Export to Excel with auto-fit column widths, returned as xlsx bytes.
+# Uses a write-only workbook so rows are streamed out instead of held as cells.
+def export_to_excel(df_reordered):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+
+    # Column widths have to be set before any rows are written
+    for i, width in enumerate(column_widths(df_reordered), start=1):
+        ws.column_dimensions[get_column_letter(i)].width = width
+
+    # Add headers and data to the worksheet
+    for row in dataframe_to_rows(df_reordered, index=False, header=True):
+        ws.append(row)
+
+    # Save the file to a BytesIO stream to enable download
+    output = io.BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+# Content hash of an uploaded workbook, used as its parse cache key
+def boss_file_key(data):
+    return hashlib.sha256(data).hexdigest()
+
+# Read a BOSS workbook and add the calculated columns; the steaming-hours filter isn't applied yet
+def parse_boss_file(data):
+    # Load the schema's columns of the Excel file, after its title rows
+    return derive_boss_columns(read_boss_excel(data))
+
+# Process one uploaded BOSS workbook end to end; runs inside a worker process.
+# Pass an already parsed DataFrame to skip reading data. Returns the vessel name, the
+# xlsx bytes, the cleaned table, the rejection summary of the steaming-hours filter and
+# rules and the DMG cross-check (see screen_boss_dataframe), the parsed frame (only when it was parsed here, so the
+# caller can cache it) and the per-stage timing records when instrument is set.
+def process_boss_file(data, min_steaming_hrs, parsed=None, instrument=False, rules=(), dmg_tolerance_pct=None):
+    recorder = StageRecorder("boss", enabled=instrument)
+    fresh = parsed is None
+    if fresh:
+        # Load the schema's columns of the Excel file, after its title rows
+        with recorder.stage("read"):
+            df = read_boss_excel(data)
+        with recorder.stage("derive"):
+            parsed = derive_boss_columns(df)
+    with recorder.stage("filter"):
+        df_reordered, rejections = screen_boss_dataframe(parsed, min_steaming_hrs, rules, dmg_tolerance_pct=dmg_tolerance_pct)
+    with recorder.stage("export"):
+        output = export_to_excel(df_reordered)
+
+    vessel_name = df_reordered["Vessel Name"].iloc[0] if "Vessel Name" in df_reordered and len(df_reordered) else "Unknown_Vessel"
+    return vessel_name, output, df_reordered, rejections, parsed if fresh else None, recorder.records
+
+# Process several workbooks on a process pool. Yields (index, (vessel_name, xlsx bytes, cleaned
+# table, rejection summary)) as each file completes so callers can report progress; index is
+# the position in file_datas. rules are data-quality rules applied to every file (eopd.quality)
+# and dmg_tolerance_pct switches on the DMG cross-check (see screen_boss_dataframe).
+# With a cache (see eopd.cache.LRUCache) parsed frames are looked up by content hash, so
+# only the filter and export run again for files that were already parsed. Stage timings
+# from the workers are added to recorder (eopd.instrument.StageRecorder) when it is enabled.
+def process_boss_files(file_datas, min_steaming_hrs, max_workers=None, cache=None, recorder=None, rules=(), dmg_tolerance_pct=None):
+    max_workers = max_workers or default_workers()
+
+    jobs = []
+    for data in file_datas:
+        key = boss_file_key(data)
+        parsed = cache.get(key) if cache is not None else None
+        jobs.append((key, None if parsed is not None else data, parsed))
+
+    instrument = recorder is not None and recorder.enabled
+
+    def finish(i, result):
+        vessel_name, output, cleaned, rejections, parsed, records = result
+        if cache is not None and parsed is not None:
+            cache.put(jobs[i][0], parsed)
+        if instrument:
+            recorder.extend(records, file=i + 1)
+        return vessel_name, output, cleaned, rejections
+
+    # A pool isn't worth starting for a single file or a single worker
+    if max_workers <= 1 or len(jobs) <= 1:
+        for i, (key, data, parsed) in enumerate(jobs):
+            yield i, finish(i, process_boss_file(data, min_steaming_hrs, parsed, instrument, rules, dmg_tolerance_pct))
+        return
+
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(jobs))) as executor:
+        futures = {executor.submit(process_boss_file, data, min_steaming_hrs, parsed, instrument, rules, dmg_tolerance_pct): i for i, (key, data, parsed) in enumerate(jobs)}
+        for future in as_completed(futures):
+            i = futures[future]
+            yield i, finish(i, future.result())
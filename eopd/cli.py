@@ -0,0 +1,131 @@
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+from eopd.workers import default_workers
+
+# Headless entry point for batch jobs, e.g.
+#   python -m eopd boss "BOSS exports/" --output-dir cleaned/ --append-to-store
+#   python -m eopd boss "BOSS exports/" --rules quality_rules.json
+#   python -m eopd curves --fit-type Exponential --output curves.csv
+
+# Clean every BOSS workbook in a directory, the same way the BOSS Raw Data Processor page does
+def run_boss(args):
+    from eopd.boss import process_boss_files
+
+    # Data-quality rules (see eopd.quality) as a JSON list of rule objects
+    rules = []
+    if args.rules:
+        with open(args.rules) as f:
+            rules = json.load(f)
+
+    paths = sorted(
+        os.path.join(args.input_dir, name) for name in os.listdir(args.input_dir)
+        if name.lower().endswith(".xlsx") and not name.startswith("~$")  # Skip Excel lock files
+    )
+    if not paths:
+        print(f"No .xlsx files found in {args.input_dir}", file=sys.stderr)
+        return 1
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    file_datas = []
+    for path in paths:
+        with open(path, "rb") as f:
+            file_datas.append(f.read())
+
+    results = [None] * len(paths)
+    for done, (i, result) in enumerate(process_boss_files(file_datas, args.min_steaming_hrs, args.workers, rules=rules, dmg_tolerance_pct=args.dmg_check), start=1):
+        results[i] = result
+        print(f"[{done}/{len(paths)}] {os.path.basename(paths[i])}: {len(result[2])} reports", flush=True)
+
+    # The input file's name keeps several exports of one vessel apart, and existing files are
+    # never overwritten (e.g. a rerun within the same minute)
+    stamp = datetime.now().strftime('%d%m%y%H%M')
+    skipped = 0
+    for path, (vessel_name, output, cleaned, _) in zip(paths, results):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        filename = f"BOSS_raw_data_{vessel_name}_{stem}_{stamp}.xlsx"
+        try:
+            with open(os.path.join(args.output_dir, filename), "xb") as f:
+                f.write(output)
+        except FileExistsError:
+            print(f"Not overwriting existing {filename} (from {os.path.basename(path)})", file=sys.stderr)
+            skipped += 1
+
+    if args.append_to_store:
+        # Imported here so the Parquet dependencies are only needed when the store is used
+        from eopd.store import append_reports
+        stored = sum(append_reports(cleaned, args.store_dir) for _, _, cleaned, _ in results)
+        print(f"Appended {stored} reports to {args.store_dir}")
+
+    # Reports rejected by the steaming-hours filter and each rule, over all files
+    from eopd.quality import combine_summaries
+
+    print()
+    print(combine_summaries([rejections for _, _, _, rejections in results]).to_string(index=False))
+
+    return 1 if skipped else 0
+
+# Fit speed - ME cons curves for every vessel and condition in the fleet store
+def run_curves(args):
+    import numpy as np
+    from eopd.fitting import FLEET_CONS_COLUMN, FLEET_GROUP_COLUMNS, accumulate_groups, accumulator_fits, evaluate_fleet_curves, fit_fleet_curves
+    from eopd.store import iter_reports, load_reports
+
+    columns = FLEET_GROUP_COLUMNS + [args.speed_column, FLEET_CONS_COLUMN]
+    if args.streaming:
+        # Sum the normal equations batch by batch instead of loading the store into memory
+        accumulators = {}
+        for batch in iter_reports(args.store_dir, columns=columns):
+            accumulate_groups(batch, accumulators, args.speed_column, args.fit_type, args.degree)
+        fits = accumulator_fits(accumulators, min_reports=args.min_reports)
+    else:
+        df = load_reports(args.store_dir, columns=columns)
+        degree = args.degree if args.fit_type == "Polynomial" else None
+        fits = fit_fleet_curves(df, args.speed_column, args.fit_type, degree, min_reports=args.min_reports, max_workers=args.workers)
+    if fits.empty:
+        print(f"No vessel in {args.store_dir} has {args.min_reports} reports to fit", file=sys.stderr)
+        return 1
+
+    curves = evaluate_fleet_curves(fits, args.fit_type, np.arange(args.min_speed, args.max_speed + args.step / 2, args.step)).round(2)
+    table = fits.drop(columns="Coefficients").set_index(FLEET_GROUP_COLUMNS).join(curves)
+    table.reset_index().to_csv(args.output, index=False)
+    print(f"Wrote {len(fits)} curves from {fits['Reports'].sum()} reports to {args.output}")
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m eopd", description="EOPD Tool House batch tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    boss = commands.add_parser("boss", help="Clean a directory of BOSS raw data workbooks")
+    boss.add_argument("input_dir", help="Directory containing BOSS .xlsx exports")
+    boss.add_argument("--output-dir", default="cleaned", help="Where to write the cleaned workbooks (default: cleaned)")
+    boss.add_argument("--min-steaming-hrs", type=float, default=22, help="Minimum Steaming Hrs per report (default: 22)")
+    boss.add_argument("--workers", type=int, default=default_workers(), help="Worker processes (default: CPU count)")
+    boss.add_argument("--rules", help="JSON file with a list of data-quality rules (see eopd.quality)")
+    boss.add_argument("--dmg-check", type=float, metavar="PCT", help="Flag reports whose reported DMG differs from the distance between consecutive positions by more than PCT%%")
+    boss.add_argument("--append-to-store", action="store_true", help="Also append the cleaned reports to the fleet store")
+    boss.add_argument("--store-dir", default=os.environ.get("EOPD_FLEET_STORE", "fleet_store"), help="Fleet store directory (default: $EOPD_FLEET_STORE or fleet_store)")
+    boss.set_defaults(func=run_boss)
+
+    curves = commands.add_parser("curves", help="Fit speed - ME cons curves per vessel and condition from the fleet store")
+    curves.add_argument("--store-dir", default=os.environ.get("EOPD_FLEET_STORE", "fleet_store"), help="Fleet store directory (default: $EOPD_FLEET_STORE or fleet_store)")
+    curves.add_argument("--output", default="fleet_speed_cons_curves.csv", help="CSV of coefficients and ME cons per speed (default: fleet_speed_cons_curves.csv)")
+    curves.add_argument("--speed-column", choices=["SOG", "STW (HC)"], default="SOG", help="Speed column to fit against (default: SOG)")
+    curves.add_argument("--fit-type", choices=["Exponential", "Polynomial"], default="Exponential", help="Curve type (default: Exponential)")
+    curves.add_argument("--degree", type=int, choices=range(1, 6), default=2, help="Polynomial degree (default: 2)")
+    curves.add_argument("--min-reports", type=int, default=10, help="Minimum reports per curve (default: 10)")
+    curves.add_argument("--min-speed", type=float, default=8, help="First speed of the output grid in kn (default: 8)")
+    curves.add_argument("--max-speed", type=float, default=15, help="Last speed of the output grid in kn (default: 15)")
+    curves.add_argument("--step", type=float, default=0.5, help="Speed grid step in kn (default: 0.5)")
+    curves.add_argument("--streaming", action="store_true", help="Fit from the store batch by batch in constant memory (no RMSE column)")
+    curves.add_argument("--workers", type=int, default=default_workers(), help="Worker processes for large fleets (default: CPU count)")
+    curves.set_defaults(func=run_curves)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,86 @@
+# Displacement normalization used by the Disp Normalization page
+
+# ME consumption scaled from one displacement to another with Admiralty exponent n
+def normalize_consumption(me_cons, current_displacement, new_displacement, n):
+    return me_cons * (new_displacement / current_displacement) ** n
+
+# Column names in a cleaned BOSS report table
+DATASET_COLUMNS = {
+    "me_cons": "ME Cons/day",
+    "disp": "Disp",
+    "speed": "SOG",
+    "vessel": "Vessel Name",
+}
+
+# Fit the Admiralty exponent n per vessel from log(ME Cons) = c + n * log(Disp) + k * log(Speed).
+# The speed term keeps speed changes between loading conditions out of n; with speed=None in
+# columns only Disp is used. All vessels are solved at once from per-vessel sums of the
+# regression terms (one groupby and one batched solve). Vessels with fewer than min_reports
+# usable reports, or without enough spread in displacement, get NaN; with no usable report at
+# all (e.g. Disp all missing) the table is empty.
+def fit_admiralty_exponent(df, columns=DATASET_COLUMNS, min_reports=10):
+    import numpy as np  # Kept out of the module imports so the single-value page stays light
+    import pandas as pd
+
+    use_speed = columns.get("speed") is not None
+    value_columns = [columns["me_cons"], columns["disp"]] + ([columns["speed"]] if use_speed else [])
+    data = df[[columns["vessel"]] + value_columns].dropna()
+    data = data[(data[value_columns] > 0).all(axis=1)]
+    fit_columns = [columns["vessel"], "Reports", "n"] + (["Speed Exponent"] if use_speed else []) + ["R2"]
+    if data.empty:
+        return pd.DataFrame(columns=fit_columns)
+
+    # Regression terms: intercept, log(Disp)[, log(Speed)] and the target log(ME Cons)
+    terms = [np.ones(len(data)), np.log(data[columns["disp"]].to_numpy(dtype=float))]
+    if use_speed:
+        terms.append(np.log(data[columns["speed"]].to_numpy(dtype=float)))
+    x = np.column_stack(terms)
+    y = np.log(data[columns["me_cons"]].to_numpy(dtype=float))
+    size = x.shape[1]
+
+    # Per-vessel sums of x x', x y and y y in one groupby
+    products = np.hstack([(x[:, :, None] * x[:, None, :]).reshape(len(x), -1), x * y[:, None], (y * y)[:, None]])
+    sums = pd.DataFrame(products).groupby(data[columns["vessel"]].to_numpy(), sort=True).sum()
+    counts = np.round(sums.iloc[:, 0].to_numpy()).astype(int)  # The intercept term sums to the count
+    grams = sums.iloc[:, :size * size].to_numpy().reshape(-1, size, size)
+    moments = sums.iloc[:, size * size:size * size + size].to_numpy()
+    sum_yy = sums.iloc[:, -1].to_numpy()
+
+    # Too few reports or nearly constant displacement / speed leave the fit undetermined
+    valid = (counts >= max(min_reports, size + 1)) & (np.linalg.cond(grams) < 1e12)
+    coeffs = np.full((len(grams), size), np.nan)
+    if valid.any():
+        coeffs[valid] = np.linalg.solve(grams[valid], moments[valid][..., None])[..., 0]
+
+    # R^2 of the log-log fit from the same sums
+    mean_y = moments[:, 0] / counts
+    total = sum_yy - counts * mean_y ** 2
+    residual = sum_yy - 2 * np.einsum("gi,gi->g", coeffs, moments) + np.einsum("gi,gij,gj->g", coeffs, grams, coeffs)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r_squared = np.where(total > 0, 1 - residual / total, np.nan)
+
+    fits = pd.DataFrame({columns["vessel"]: sums.index, "Reports": counts, "n": coeffs[:, 1]})
+    if use_speed:
+        fits["Speed Exponent"] = coeffs[:, 2]
+    fits["R2"] = r_squared
+    return fits
+
+# Add ME cons normalized to reference_displacement for every report. n is a single exponent
+# or a Series of exponents indexed by vessel name (e.g. fits.set_index("Vessel Name")["n"]);
+# vessels missing from it use default_n.
+def normalize_dataset(df, reference_displacement, n=0.66, columns=DATASET_COLUMNS, default_n=0.66):
+    import numpy as np
+    import pandas as pd
+
+    me_cons = df[columns["me_cons"]].to_numpy(dtype=float)
+    disp = df[columns["disp"]].to_numpy(dtype=float)
+    if isinstance(n, pd.Series):
+        n = n.reindex(df[columns["vessel"]].to_numpy()).fillna(default_n).to_numpy(dtype=float)
+
+    # Reports without a positive displacement can't be scaled
+    disp = np.where(disp > 0, disp, np.nan)
+
+    result = df.copy()
+    result["Admiralty n"] = np.round(np.broadcast_to(n, len(df)), 3)
+    result["ME Cons/day (normalized)"] = np.round(normalize_consumption(me_cons, disp, reference_displacement, n), 2)
+    return result
@@ -0,0 +1,296 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+
+from eopd.workers import default_workers
+
+# Speed - ME consumption curve fits used by the Cons Extrapolator page
+
+MAX_DEGREE = 5
+
+# Speeds are shifted and scaled by these (kn) before their powers are summed, which keeps the
+# normal equations of a degree 5 fit well conditioned
+ACCUMULATOR_CENTER = 12.0
+ACCUMULATOR_SCALE = 4.0
+
+# Fleet fits are made per vessel and loading condition of the cleaned BOSS reports
+FLEET_GROUP_COLUMNS = ["Vessel Name", "Condition"]
+FLEET_SPEED_COLUMNS = ["SOG", "STW (HC)"]
+FLEET_CONS_COLUMN = "ME Cons/day"
+
+# Below this many reports the fits take less time than starting a process pool
+# (300 vessels x 2 conditions x 200 reports fit in well under a second inline)
+FLEET_POOL_MIN_REPORTS = 1_000_000
+
+# Exponential fit ME Cons = a * exp(b * Speed), via a linear fit of log(ME Cons)
+def fit_exponential(speed, me_cons):
+    b, log_a = np.polyfit(speed, np.log(me_cons), 1)
+    return np.exp(log_a), b
+
+# Polynomial fit of the given degree, returned as a callable np.poly1d
+def fit_polynomial(speed, me_cons, degree):
+    return np.poly1d(np.polyfit(speed, me_cons, degree))
+
+
+# Coefficients of the selected fit type: [a, b] for "Exponential", polynomial coefficients
+# (highest power first) otherwise. Plain arrays so fits can be cached and passed around.
+def fit_curve(speed, me_cons, fit_type, degree=2):
+    if fit_type == "Exponential":
+        return np.array(fit_exponential(speed, me_cons))
+    return fit_polynomial(speed, me_cons, degree).coeffs
+
+# ME Cons predicted at speed by coefficients from fit_curve
+def evaluate_curve(fit_type, coeffs, speed):
+    if fit_type == "Exponential":
+        a, b = coeffs
+        return a * np.exp(b * np.asarray(speed))
+    return np.polyval(coeffs, speed)
+
+# Human-readable formula of a fit from fit_curve
+def curve_formula(fit_type, coeffs):
+    if fit_type == "Exponential":
+        a, b = coeffs
+        return f"ME Cons = {a:.4f} * exp({b:.4f} * Speed)"
+    return f"ME Cons = {' + '.join([f'{c:.4f}*Speed^{i}' for i, c in enumerate(coeffs[::-1])])}"
+
+# Fit each (speed, me_cons) pair of arrays; returns coefficients and RMSE per group
+def _fit_groups(groups, fit_type, degree):
+    results = []
+    for speed, me_cons in groups:
+        coeffs = fit_curve(speed, me_cons, fit_type, degree)
+        rmse = np.sqrt(np.mean((me_cons - evaluate_curve(fit_type, coeffs, speed)) ** 2))
+        results.append((coeffs, rmse))
+    return results
+
+# Reports usable for a fit: speed and ME cons present and above zero
+def _fit_data(df, group_columns, speed_column, cons_column):
+    data = df[list(group_columns) + [speed_column, cons_column]].dropna()
+    return data[(data[speed_column] > 0) & (data[cons_column] > 0)]
+
+# Usable reports of each vessel / condition with at least min_reports reports, as a table of
+# group keys and a matching list of (speed, me_cons) arrays
+def _fleet_groups(df, speed_column, group_columns, cons_column, min_reports):
+    group_columns = list(group_columns)
+    data = _fit_data(df, group_columns, speed_column, cons_column)
+
+    indices = [(key, positions) for key, positions in data.groupby(group_columns, sort=True).indices.items() if len(positions) >= min_reports]
+    speed = data[speed_column].to_numpy(dtype=float)
+    me_cons = data[cons_column].to_numpy(dtype=float)
+
+    keys = pd.DataFrame([key if isinstance(key, tuple) else (key,) for key, _ in indices], columns=group_columns)
+    keys["Reports"] = [len(positions) for _, positions in indices]
+    return keys, [(speed[positions], me_cons[positions]) for _, positions in indices]
+
+# Run fn(groups, *args) over the groups, split into chunks on a process pool for large fleets.
+# fn returns one result per group; results come back in group order.
+def _map_groups(fn, groups, args, n_reports, max_workers):
+    max_workers = max_workers or default_workers()
+    if max_workers <= 1 or len(groups) <= 1 or n_reports < FLEET_POOL_MIN_REPORTS:
+        return fn(groups, *args)
+
+    chunks = [chunk for chunk in np.array_split(np.arange(len(groups)), min(max_workers, len(groups))) if len(chunk)]
+    with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+        chunk_results = executor.map(fn, [[groups[i] for i in chunk] for chunk in chunks], *[repeat(arg) for arg in args])
+        return [result for chunk in chunk_results for result in chunk]
+
+# Fit one speed - ME cons curve per vessel and condition of a cleaned BOSS report table.
+# Reports without a positive speed and ME cons are ignored, as are groups with fewer than
+# min_reports reports. Large fleets are split into chunks of groups fitted on a process pool.
+# Returns one row per group with the report count, coefficients (as from fit_curve), formula and RMSE.
+def fit_fleet_curves(df, speed_column="SOG", fit_type="Exponential", degree=2, group_columns=FLEET_GROUP_COLUMNS,
+                     cons_column=FLEET_CONS_COLUMN, min_reports=10, max_workers=None):
+    fits, groups = _fleet_groups(df, speed_column, group_columns, cons_column, min_reports)
+    results = _map_groups(_fit_groups, groups, (fit_type, degree), fits["Reports"].sum(), max_workers)
+
+    fits["Coefficients"] = [coeffs for coeffs, _ in results]
+    fits["Formula"] = [curve_formula(fit_type, coeffs) for coeffs, _ in results]
+    fits["RMSE"] = [rmse for _, rmse in results]
+    return fits
+
+# ME cons of every fitted curve at every speed in speed_grid, evaluated in one array
+# operation. Returns one row per curve (indexed by the group columns) and one column per speed.
+def evaluate_fleet_curves(fits, fit_type, speed_grid, group_columns=FLEET_GROUP_COLUMNS):
+    speed_grid = np.asarray(speed_grid, dtype=float)
+    coeffs = np.vstack(fits["Coefficients"].to_list()) if len(fits) else np.empty((0, 2 if fit_type == "Exponential" else 1))
+    if fit_type == "Exponential":
+        values = coeffs[:, :1] * np.exp(coeffs[:, 1:2] * speed_grid)
+    else:
+        values = coeffs @ np.vander(speed_grid, coeffs.shape[1]).T
+    index = pd.MultiIndex.from_frame(fits[list(group_columns)]) if len(group_columns) > 1 else pd.Index(fits[group_columns[0]])
+    return pd.DataFrame(values, index=index, columns=np.round(speed_grid, 2))
+
+# Least-squares fit built up chunk by chunk from normal-equation sums, so memory doesn't grow
+# with the number of reports. Accumulators with the same settings (e.g. from different
+# workers) can be merged. coefficients() matches fit_curve / np.polyfit on all the data
+# to floating-point precision.
+class CurveAccumulator:
+    def __init__(self, fit_type="Exponential", degree=2, center=ACCUMULATOR_CENTER, scale=ACCUMULATOR_SCALE):
+        self.fit_type = fit_type
+        self.degree = 1 if fit_type == "Exponential" else degree  # Exponential is a line through log(ME Cons)
+        if not 1 <= self.degree <= MAX_DEGREE:
+            raise ValueError(f"Polynomial degree must be between 1 and {MAX_DEGREE}, got {degree}")
+        self.center = center
+        self.scale = scale
+        self.count = 0
+        self.power_sums = np.zeros(2 * self.degree + 1)  # sum of t**k, t the scaled speed
+        self.moment_sums = np.zeros(self.degree + 1)  # sum of t**k * y
+
+    # Add a chunk of reports
+    def add(self, speed, me_cons):
+        powers = np.vander((np.asarray(speed, dtype=float) - self.center) / self.scale, 2 * self.degree + 1, increasing=True)
+        y = np.asarray(me_cons, dtype=float)
+        if self.fit_type == "Exponential":
+            y = np.log(y)
+        self.add_sums(len(powers), powers.sum(axis=0), powers[:, :self.degree + 1].T @ y)
+        return self
+
+    # Add sums computed elsewhere, e.g. per group in accumulate_groups
+    def add_sums(self, count, power_sums, moment_sums):
+        self.count += count
+        self.power_sums += power_sums
+        self.moment_sums += moment_sums
+        return self
+
+    # Add another accumulator's reports to this one
+    def merge(self, other):
+        if (other.fit_type, other.degree, other.center, other.scale) != (self.fit_type, self.degree, self.center, self.scale):
+            raise ValueError("Only accumulators with the same fit type, degree, center and scale can be merged")
+        return self.add_sums(other.count, other.power_sums, other.moment_sums)
+
+    # Coefficients as returned by fit_curve: [a, b] for "Exponential", polynomial
+    # coefficients (highest power first) otherwise
+    def coefficients(self):
+        if self.count <= self.degree:
+            raise ValueError(f"A degree {self.degree} fit needs at least {self.degree + 1} reports, got {self.count}")
+        gram = self.power_sums[np.add.outer(np.arange(self.degree + 1), np.arange(self.degree + 1))]
+        scaled = np.linalg.solve(gram, self.moment_sums)
+
+        # Back from powers of (speed - center) / scale to powers of speed
+        domain = [self.center - self.scale, self.center + self.scale]
+        coeffs = np.polynomial.Polynomial(scaled, domain=domain, window=[-1, 1]).convert().coef
+        coeffs = np.pad(coeffs, (0, self.degree + 1 - len(coeffs)))[::-1]
+        if self.fit_type == "Exponential":
+            b, log_a = coeffs
+            return np.array([np.exp(log_a), b])
+        return coeffs
+
+# Add the reports of one chunk to per-group accumulators, keyed like a groupby on group_columns.
+# The sums for every group come from a single groupby, not a Python loop over reports.
+def accumulate_groups(df, accumulators=None, speed_column="SOG", fit_type="Exponential", degree=2,
+                      group_columns=FLEET_GROUP_COLUMNS, cons_column=FLEET_CONS_COLUMN):
+    accumulators = {} if accumulators is None else accumulators
+    group_columns = list(group_columns)
+    data = _fit_data(df, group_columns, speed_column, cons_column)
+    if data.empty:
+        return accumulators
+
+    template = CurveAccumulator(fit_type, degree)
+    n_powers = 2 * template.degree + 1
+    powers = np.vander((data[speed_column].to_numpy(dtype=float) - template.center) / template.scale, n_powers, increasing=True)
+    y = data[cons_column].to_numpy(dtype=float)
+    if fit_type == "Exponential":
+        y = np.log(y)
+    sums = pd.DataFrame(np.hstack([powers, powers[:, :template.degree + 1] * y[:, None]]), index=data.index)
+    sums = sums.groupby([data[column] for column in group_columns], sort=False).sum()
+
+    for key, row in zip(sums.index, sums.to_numpy()):
+        if key not in accumulators:
+            accumulators[key] = CurveAccumulator(fit_type, degree, template.center, template.scale)
+        accumulators[key].add_sums(int(round(row[0])), row[:n_powers], row[n_powers:])  # t**0 sums to the count
+    return accumulators
+
+# Fit table like fit_fleet_curves (without RMSE) from per-group accumulators
+def accumulator_fits(accumulators, group_columns=FLEET_GROUP_COLUMNS, min_reports=10):
+    items = sorted(((key, acc) for key, acc in accumulators.items() if acc.count >= max(min_reports, acc.degree + 1)), key=lambda item: item[0])
+    fits = pd.DataFrame([key if isinstance(key, tuple) else (key,) for key, _ in items], columns=list(group_columns))
+    fits["Reports"] = [acc.count for _, acc in items]
+    fits["Coefficients"] = [acc.coefficients() for _, acc in items]
+    fits["Formula"] = [curve_formula(acc.fit_type, coeffs) for (_, acc), coeffs in zip(items, fits["Coefficients"])]
+    return fits
+
+# Candidate models for cross-validation: the exponential model and every polynomial degree
+CV_MODELS = [("Exponential", None)] + [("Polynomial", degree) for degree in range(1, MAX_DEGREE + 1)]
+
+# Model name as shown in the Cons Extrapolator
+def model_name(fit_type, degree):
+    return fit_type if fit_type == "Exponential" else f"Polynomial (degree {degree})"
+
+# k-fold cross-validated RMSE (MT/24Hr) of every model in CV_MODELS, in that order. The
+# normal-equation sums are computed once per fold; each fold's training sums are the totals
+# minus its own, and all folds and models are solved in one batched np.linalg.solve (smaller
+# degrees padded to the largest). Models that can't be fitted on every training fold get NaN.
+def _cv_rmse(speed, me_cons, k, seed):
+    speed = np.asarray(speed, dtype=float)
+    me_cons = np.asarray(me_cons, dtype=float)
+    n = len(speed)
+    k = max(2, min(k, n))
+    size = MAX_DEGREE + 1
+
+    # Fold of each report, from a fixed shuffle so results are repeatable
+    folds = np.empty(n, dtype=int)
+    folds[np.random.default_rng(seed).permutation(n)] = np.arange(n) % k
+
+    powers = np.vander((speed - ACCUMULATOR_CENTER) / ACCUMULATOR_SCALE, 2 * MAX_DEGREE + 1, increasing=True)
+    targets = np.column_stack([np.log(me_cons), me_cons])  # Exponential fits log(ME Cons)
+    fold_power_sums = np.zeros((k, 2 * MAX_DEGREE + 1))
+    np.add.at(fold_power_sums, folds, powers)
+    fold_moment_sums = np.zeros((k, size, 2))
+    np.add.at(fold_moment_sums, folds, powers[:, :size, None] * targets[:, None, :])
+    train_power_sums = fold_power_sums.sum(axis=0) - fold_power_sums
+    train_moment_sums = fold_moment_sums.sum(axis=0) - fold_moment_sums
+    train_counts = n - np.bincount(folds, minlength=k)
+
+    # Gram matrices and right-hand sides of every (model, fold), padded to size x size
+    grams = np.broadcast_to(np.eye(size), (len(CV_MODELS), k, size, size)).copy()
+    moments = np.zeros((len(CV_MODELS), k, size))
+    full_grams = train_power_sums[:, np.add.outer(np.arange(size), np.arange(size))]
+    valid = np.zeros(len(CV_MODELS), dtype=bool)
+    for m, (fit_type, degree) in enumerate(CV_MODELS):
+        d = 1 if fit_type == "Exponential" else degree
+        grams[m, :, :d + 1, :d + 1] = full_grams[:, :d + 1, :d + 1]
+        moments[m, :, :d + 1] = train_moment_sums[:, :d + 1, 0 if fit_type == "Exponential" else 1]
+        valid[m] = train_counts.min() > d
+
+    try:
+        scaled = np.linalg.solve(grams, moments[..., None])[..., 0]
+    except np.linalg.LinAlgError:
+        scaled = np.einsum("mkij,mkj->mki", np.linalg.pinv(grams), moments)  # e.g. all reports at one speed
+
+    # Predict every report from the models trained without its fold
+    predictions = np.einsum("ij,mij->mi", powers[:, :size], scaled[:, folds])
+    predictions[0] = np.exp(predictions[0])
+    rmse = np.sqrt(np.mean((me_cons - predictions) ** 2, axis=1))
+    rmse[~valid] = np.nan
+    return rmse
+
+# Cross-validated RMSE of every model in CV_MODELS as a table of Model, Fit Type, Degree and
+# CV RMSE, best first
+def cross_validate_curves(speed, me_cons, k=5, seed=0):
+    rmse = _cv_rmse(speed, me_cons, k, seed)
+    results = pd.DataFrame({
+        "Model": [model_name(fit_type, degree) for fit_type, degree in CV_MODELS],
+        "Fit Type": [fit_type for fit_type, _ in CV_MODELS],
+        "Degree": pd.array([degree for _, degree in CV_MODELS], dtype="Int64"),
+        "CV RMSE": rmse,
+    })
+    return results.sort_values("CV RMSE", kind="stable", na_position="last").reset_index(drop=True)
+
+# Cross-validate each (speed, me_cons) pair of arrays; returns the CV RMSE array of each group
+def _cross_validate_groups(groups, k, seed):
+    return [_cv_rmse(speed, me_cons, k, seed) for speed, me_cons in groups]
+
+# Cross-validated model selection per vessel and condition (see fit_fleet_curves for the
+# grouping). Returns one row per group with the best model, its CV RMSE and the CV RMSE
+# of every model.
+def cross_validate_fleet(df, speed_column="SOG", group_columns=FLEET_GROUP_COLUMNS, cons_column=FLEET_CONS_COLUMN,
+                         min_reports=10, k=5, seed=0, max_workers=None):
+    keys, groups = _fleet_groups(df, speed_column, group_columns, cons_column, min_reports)
+    results = _map_groups(_cross_validate_groups, groups, (k, seed), keys["Reports"].sum(), max_workers)
+
+    model_names = [model_name(fit_type, degree) for fit_type, degree in CV_MODELS]
+    errors = pd.DataFrame(np.reshape(results, (len(results), len(CV_MODELS))), columns=model_names)
+    keys["Best Model"] = errors.fillna(np.inf).idxmin(axis=1).where(errors.notna().any(axis=1)) if len(errors) else []
+    keys["CV RMSE"] = errors.min(axis=1)
+    return pd.concat([keys, errors.add_prefix("CV RMSE ")], axis=1)
@@ -0,0 +1,69 @@
+import json
+import logging
+import multiprocessing
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Opt-in per-stage timing and peak memory measurement. Pages wrap their slow steps in
+# recorder.stage(...); when the recorder is disabled the stages cost nothing.
+# Peak memory comes from tracemalloc, which is process-wide and slows allocation-heavy
+# code (openpyxl parsing especially), so figures are indicative and only collected
+# while instrumentation is switched on. As sessions of the app are threads of one process,
+# memory is only measured in worker processes (one task at a time) by default; stages run
+# on the server record peak_mb None rather than figures mixed with other sessions' work.
+
+logger = logging.getLogger("eopd.instrument")
+
+# Send the JSON lines to stderr (the server log) unless the host app set up its own handlers
+def configure_logging(level=logging.INFO):
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(level)
+        logger.propagate = False
+
+class StageRecorder:
+    # trace_memory None: measure memory only when running in a worker process
+    def __init__(self, page, enabled=True, trace_memory=None):
+        self.page = page
+        self.enabled = enabled
+        self.trace_memory = multiprocessing.parent_process() is not None if trace_memory is None else trace_memory
+        self.records = []
+
+    # Time (and measure the peak traced memory of) the code in the with block. Extra
+    # keyword labels, e.g. file="x.xlsx", are stored on the record. Memory is only measured
+    # when this stage starts tracing, so a stage nested in another (or run while something
+    # else traces) never resets or stops a measurement in progress.
+    @contextmanager
+    def stage(self, name, **labels):
+        if not self.enabled:
+            yield
+            return
+
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+            base = tracemalloc.get_traced_memory()[0]
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            peak_mb = None
+            if started_tracing:
+                peak_mb = (tracemalloc.get_traced_memory()[1] - base) / 2**20
+                tracemalloc.stop()
+            self.records.append({"page": self.page, "stage": name, "seconds": seconds, "peak_mb": peak_mb, **labels})
+
+    # Add records measured elsewhere, e.g. returned from a worker process
+    def extend(self, records, **labels):
+        if self.enabled:
+            self.records.extend({**record, "page": self.page, **labels} for record in records)
+
+    # Emit each record as one JSON log line for aggregation across users
+    def log(self):
+        for record in self.records:
+            logger.info(json.dumps({"event": "stage_timing", **record}, default=str))
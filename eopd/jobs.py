@@ -0,0 +1,224 @@
+import itertools
+import multiprocessing
+import sys
+import threading
+import time
+import types
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from eopd.workers import default_workers
+
+# Background processing of BOSS uploads. A JobQueue owns a worker pool and the state of
+# every job submitted to it, so a page can submit files, return straight away and pick up
+# progress and finished outputs on later script runs (the queue lives in st.cache_resource,
+# outside the rerun cycle). Each file is one task on the pool. Its done-callback hands the
+# result to a collector thread, which fills the parse cache, appends to the fleet store and
+# compacts the cleaned table, so the pool's result handling is never held up by that work.
+# pandas / openpyxl load with the first submitted job. The worker count is fixed when the
+# queue is created, as the pool is shared by every session.
+
+# Finished jobs are kept for downloads until they're older than this, or until their outputs
+# and cleaned tables together take more than MAX_FINISHED_JOB_BYTES (oldest dropped first)
+MAX_FINISHED_JOB_AGE = 2 * 3600
+MAX_FINISHED_JOB_BYTES = 512 * 2**20
+
+# One submitted batch of BOSS workbooks. results[i] is (vessel name, xlsx bytes, compacted
+# cleaned table, rejection summary) once file i is done; errors[i] is the error message if it failed.
+class BossJob:
+    def __init__(self, job_id, names, min_steaming_hrs, append_to_store, rules=(), dmg_tolerance_pct=None):
+        self.id = job_id
+        self.names = list(names)
+        self.min_steaming_hrs = min_steaming_hrs
+        self.append_to_store = append_to_store
+        self.rules = list(rules)
+        self.dmg_tolerance_pct = dmg_tolerance_pct
+        self.results = [None] * len(self.names)
+        self.errors = [None] * len(self.names)
+        self.records = []  # Stage timings from the workers, when instrumented
+        self.stored = 0
+        self.memory_before = 0
+        self.memory_after = 0
+        self.output_bytes = 0
+        self.submitted_at = time.time()
+        self.finished_at = None
+
+    @property
+    def done(self):
+        return sum(result is not None or error is not None for result, error in zip(self.results, self.errors))
+
+    @property
+    def finished(self):
+        return self.done == len(self.names)
+
+    # Rejections by rule over every finished file (see eopd.quality.combine_summaries)
+    def rejections(self):
+        from eopd.quality import combine_summaries
+
+        summaries = [result[3] for result in self.results if result is not None]
+        if not summaries:
+            return None
+        return combine_summaries(summaries)
+
+    # Bytes held for the job's downloads: xlsx outputs and compacted cleaned tables
+    @property
+    def nbytes(self):
+        return self.output_bytes + self.memory_after
+
+    @property
+    def status(self):
+        if not self.finished:
+            return "running"
+        return "failed" if any(self.errors) else "done"
+
+# Spawned workers re-run the parent's __main__, which in the app is the page script being
+# run. Processes (started by pool.submit as needed) see a bare __main__ instead. The old one is
+# put back unless the server has installed another script's module meanwhile.
+@contextmanager
+def _bare_main():
+    main = sys.modules.get("__main__")
+    bare = sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        yield
+    finally:
+        if sys.modules.get("__main__") is bare:
+            sys.modules["__main__"] = main
+
+class JobQueue:
+    def __init__(self, max_workers=None, cache=None, max_age=MAX_FINISHED_JOB_AGE, max_bytes=MAX_FINISHED_JOB_BYTES):
+        self.max_workers = max_workers or default_workers()
+        self.cache = cache  # eopd.cache.LRUCache of parsed workbooks, keyed on content hash
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._executor = None
+        self._collector = ThreadPoolExecutor(max_workers=1)  # Runs _collect, one file at a time
+        self._lock = threading.Lock()
+
+    # The pool for new tasks. Processes unless a single worker is asked for; a thread then
+    # keeps the work off the script thread without starting a process. Workers are spawned
+    # rather than forked from the (threaded) server process.
+    def _pool(self):
+        if self._executor is None:
+            if self.max_workers > 1:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=1)
+        return self._executor
+
+    # Submit one task. A process pool is broken for good once a worker dies (e.g. killed for
+    # memory); it's then replaced, so one lost worker doesn't fail every later job.
+    def _submit(self, fn, *args):
+        with self._lock:
+            pool = self._pool()
+        try:
+            with _bare_main():
+                return pool.submit(fn, *args)
+        except BrokenProcessPool:
+            with self._lock:
+                if self._executor is pool:
+                    pool.shutdown(wait=False)
+                    self._executor = None
+                pool = self._pool()
+            with _bare_main():
+                return pool.submit(fn, *args)
+
+    # Queue file_datas (xlsx bytes, named names) for processing and return the job id without
+    # waiting; rules and dmg_tolerance_pct are passed on to eopd.boss.screen_boss_dataframe.
+    # The job is listed once every file is queued; if queueing stops with an error, the files
+    # not queued are failed with it, so the job still finishes.
+    def submit(self, names, file_datas, min_steaming_hrs, append_to_store=False, instrument=False, rules=(), dmg_tolerance_pct=None):
+        from eopd.boss import boss_file_key, process_boss_file
+
+        with self._lock:
+            job = BossJob(next(self._ids), names, min_steaming_hrs, append_to_store, rules, dmg_tolerance_pct)
+
+        futures = []
+        try:
+            for i, data in enumerate(file_datas):
+                key = boss_file_key(data)
+                parsed = self.cache.get(key) if self.cache is not None else None
+                futures.append((i, key, self._submit(process_boss_file, None if parsed is not None else data, min_steaming_hrs, parsed, instrument, job.rules, job.dmg_tolerance_pct)))
+        except Exception as e:
+            for i in range(len(futures), len(job.names)):
+                job.errors[i] = f"{type(e).__name__}: {e}"
+            if job.finished:
+                job.finished_at = time.time()
+
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict()
+        for i, key, future in futures:
+            future.add_done_callback(lambda future, i=i, key=key: self._finish(job, i, key, future))
+        return job.id
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    # Drop the finished jobs among job_ids (e.g. a session clearing its list); running ones stay
+    def remove(self, job_ids):
+        with self._lock:
+            for job_id in job_ids:
+                job = self._jobs.get(job_id)
+                if job is not None and job.finished:
+                    del self._jobs[job_id]
+
+    # Done-callback of one file's task, run on the pool's result thread: only hands it on
+    def _finish(self, job, i, key, future):
+        self._collector.submit(self._collect, job, i, key, future)
+
+    # Record one file's result, after the store append and compaction; runs on the collector thread
+    def _collect(self, job, i, key, future):
+        try:
+            vessel_name, output, cleaned, rejections, parsed, records = future.result()
+            if self.cache is not None and parsed is not None:
+                self.cache.put(key, parsed)
+
+            from eopd.boss import compact_boss_dataframe, memory_bytes
+
+            stored = 0
+            if job.append_to_store:
+                from eopd.store import append_reports
+
+                stored = append_reports(cleaned)
+            compact = compact_boss_dataframe(cleaned)
+        except Exception as e:
+            self._fail(job, i, e)
+            return
+
+        with self._lock:
+            job.records.extend({**record, "file": i + 1} for record in records)
+            job.stored += stored
+            job.memory_before += memory_bytes(cleaned)
+            job.memory_after += memory_bytes(compact)
+            job.output_bytes += len(output)
+            job.results[i] = (vessel_name, output, compact, rejections)
+            if job.finished:
+                job.finished_at = time.time()
+                self._evict(keep=job.id)
+
+    def _fail(self, job, i, error):
+        with self._lock:
+            job.errors[i] = f"{type(error).__name__}: {error}"
+            if job.finished:
+                job.finished_at = time.time()
+                self._evict(keep=job.id)
+
+    # Drop finished jobs older than max_age, then the oldest until those left fit in max_bytes.
+    # The job keep (just finished) stays even on its own over max_bytes. Called with the lock held.
+    def _evict(self, keep=None):
+        now = time.time()
+        finished = sorted((job for job in self._jobs.values() if job.finished and job.id != keep), key=lambda job: job.finished_at or job.submitted_at)
+        total = sum(job.nbytes for job in self._jobs.values() if job.finished)
+        for job in finished:
+            if now - (job.finished_at or job.submitted_at) <= self.max_age and total <= self.max_bytes:
+                break
+            del self._jobs[job.id]
+            total -= job.nbytes
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+        self._collector.shutdown(wait=wait)
@@ -0,0 +1,141 @@
+import numpy as np
+
+# Current triangle / speed-through-water kernels used by the Current Factor and STW pages.
+# The helpers use NumPy ufuncs so they accept plain numbers as well as arrays /
+# DataFrame columns (broadcast against each other) for batch mode.
+
+# Helper function to calculate Speed Through Water (STW) and heading
+def calculate_stw(cog, sog, current_dir, current_speed):
+    # Convert angles to radians
+    cog_rad = np.radians(cog)
+    current_dir_rad = np.radians(current_dir)
+
+    # Resolve SOG and current speed into x and y components
+    sog_x = sog * np.cos(cog_rad)
+    sog_y = sog * np.sin(cog_rad)
+    current_x = current_speed * np.cos(current_dir_rad)
+    current_y = current_speed * np.sin(current_dir_rad)
+
+    # Calculate STW components
+    stw_x = sog_x - current_x
+    stw_y = sog_y - current_y
+
+    # Calculate STW and heading
+    stw = np.hypot(stw_x, stw_y)
+    heading = np.degrees(np.arctan2(stw_y, stw_x)) % 360
+
+    return stw, heading, sog_x, sog_y, current_x, current_y
+
+# Helper function to calculate Speed Over Ground (SOG) and Course Over Ground (COG)
+def calculate_sog(stw, heading, current_dir, current_speed):
+    # Convert angles to radians
+    heading_rad = np.radians(heading)
+    current_dir_rad = np.radians(current_dir)
+
+    # Resolve STW and current speed into x and y components
+    stw_x = stw * np.cos(heading_rad)
+    stw_y = stw * np.sin(heading_rad)
+    current_x = current_speed * np.cos(current_dir_rad)
+    current_y = current_speed * np.sin(current_dir_rad)
+
+    # Calculate SOG components
+    sog_x = stw_x + current_x
+    sog_y = stw_y + current_y
+
+    # Calculate SOG and COG
+    sog = np.hypot(sog_x, sog_y)
+    cog = np.degrees(np.arctan2(sog_y, sog_x)) % 360
+
+    return sog, cog
+
+# Helper function to calculate Current Direction and Speed
+def calculate_current(sog, cog, stw, heading):
+    # Convert angles to radians
+    cog_rad = np.radians(cog)
+    heading_rad = np.radians(heading)
+
+    # Resolve SOG and STW into x and y components
+    sog_x = sog * np.cos(cog_rad)
+    sog_y = sog * np.sin(cog_rad)
+    stw_x = stw * np.cos(heading_rad)
+    stw_y = stw * np.sin(heading_rad)
+
+    # Calculate current components
+    current_x = sog_x - stw_x
+    current_y = sog_y - stw_y
+
+    # Calculate current speed and direction
+    current_speed = np.hypot(current_x, current_y)
+    current_dir = np.degrees(np.arctan2(current_y, current_x)) % 360
+
+    return current_dir, current_speed
+
+# Column names expected in a batch upload, keyed by calculation input
+BATCH_COLUMNS = {
+    "cog": "COG",
+    "sog": "SOG",
+    "current_dir": "Current Dir",
+    "current_speed": "Current Speed",
+}
+
+# Helper function to add STW, heading and current factor columns for every row
+def calculate_stw_batch(df, columns=BATCH_COLUMNS):
+    cog = df[columns["cog"]].to_numpy(dtype=float)
+    sog = df[columns["sog"]].to_numpy(dtype=float)
+    current_dir = df[columns["current_dir"]].to_numpy(dtype=float)
+    current_speed = df[columns["current_speed"]].to_numpy(dtype=float)
+
+    stw, heading = calculate_stw(cog, sog, current_dir, current_speed)[:2]
+
+    result = df.copy()
+    result["STW"] = np.round(stw, 2)
+    result["Heading"] = np.round(heading, 1)
+    result["Current Factor"] = np.round(sog - stw, 2)
+    return result
+
+# Grids of the current factor surface, matching the Current Factor page's slider steps
+SURFACE_ANGLES = np.arange(0, 361, 5)  # COG and current direction, deg
+SURFACE_CURRENT_SPEEDS = np.arange(0, 5.01, 0.25)  # kts
+
+# Current factors over all courses within this of each other (kts) favour no course, as with
+# no current, where the surface is zero up to rounding noise
+SURFACE_FACTOR_TOLERANCE = 0.05
+
+# Current factor (SOG - STW), STW and heading for every COG x current direction x current
+# speed on the surface grids at one SOG, from a single broadcast calculate_stw call.
+# Each array is indexed [course, current direction, current speed].
+def current_factor_surface(sog, courses=SURFACE_ANGLES, current_dirs=SURFACE_ANGLES, current_speeds=SURFACE_CURRENT_SPEEDS):
+    cog, current_dir, current_speed = np.meshgrid(courses, current_dirs, current_speeds, indexing="ij", sparse=True)
+    stw, heading = calculate_stw(cog, sog, current_dir, current_speed)[:2]
+    return sog - stw, stw, heading
+
+# Index of the grid point nearest to value, for looking up a slider setting on the surface
+def surface_index(grid, value):
+    return int(np.abs(grid - value).argmin())
+
+# Helper function for the STW page: STW and course from heading, SOG and current (compass convention)
+def calculate_speed_through_water(ship_heading, sog, current_speed, current_direction):
+    # Convert headings and directions from degrees to radians
+    ship_heading_rad = np.radians(ship_heading)
+    current_direction_rad = np.radians(current_direction)
+    
+    # Resolve the ship's velocity into components
+    ship_velocity_x = sog * np.sin(ship_heading_rad)
+    ship_velocity_y = sog * np.cos(ship_heading_rad)
+
+    # Resolve the current's velocity into components
+    current_velocity_x = current_speed * np.sin(current_direction_rad)
+    current_velocity_y = current_speed * np.cos(current_direction_rad)
+
+    # Calculate the resulting velocity components
+    resultant_velocity_x = ship_velocity_x - current_velocity_x
+    resultant_velocity_y = ship_velocity_y - current_velocity_y
+
+    # Calculate speed through water
+    stw = np.hypot(resultant_velocity_x, resultant_velocity_y)
+    
+    # Calculate ship's course
+    course_rad = np.arctan2(resultant_velocity_x, resultant_velocity_y)
+    course_deg = np.degrees(course_rad) % 360
+    
+    return stw, course_deg, resultant_velocity_x, resultant_velocity_y
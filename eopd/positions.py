@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Noon report positions: parsing the degrees / minutes strings of the Lat and Long columns,
+# and great-circle distances and courses between consecutive reports, as a cross-check of
+# the reported distance (DMG) and a stand-in for the heading reports don't have. Everything works on whole columns; there is no loop over reports. Position
+# strings are matched with Arrow's regex kernel, several times faster than Series.str.extract.
+
+EARTH_RADIUS_NM = 3440.065
+
+# "12 34.5 N", "103 50.2 E", also with a degree sign or minute mark ("12° 34.5' N")
+POSITION_PATTERN = r"^\s*(?P<degrees>\d{1,3})\s*°?\s*(?P<minutes>\d{1,2}(?:\.\d*)?)\s*'?\s*(?P<hemisphere>[NSEWnsew])\s*$"
+
+# Distance mismatches smaller than this are never flagged, however short the leg (NM)
+MIN_DISTANCE_TOLERANCE_NM = 5.0
+
+# Signed decimal degrees (south and west negative) of position strings; NaN where a value
+# doesn't parse or is out of range
+def parse_positions(values):
+    parts = pc.extract_regex(pa.array(pd.Series(values, dtype="str")), POSITION_PATTERN)
+    degrees = pc.struct_field(parts, "degrees").cast(pa.float64()).to_numpy(zero_copy_only=False)
+    minutes = pc.struct_field(parts, "minutes").cast(pa.float64()).to_numpy(zero_copy_only=False)
+    hemisphere = pc.utf8_upper(pc.struct_field(parts, "hemisphere")).to_numpy(zero_copy_only=False)
+
+    decimal = degrees + minutes / 60
+    decimal = np.where(np.isin(hemisphere, ["S", "W"]), -decimal, decimal)
+    limit = np.where(np.isin(hemisphere, ["N", "S"]), 90, 180)
+    return np.where((minutes < 60) & (np.abs(decimal) <= limit), decimal, np.nan)
+
+# Great-circle distance in NM between positions in decimal degrees (arrays broadcast)
+def haversine_nm(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_NM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+# Course (deg true) of the great circle at lat2 / lon2 when arriving there from lat1 / lon1
+def final_bearing(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    x = np.sin(lon1 - lon2) * np.cos(lat1)
+    y = np.cos(lat2) * np.sin(lat1) - np.sin(lat2) * np.cos(lat1) * np.cos(lon1 - lon2)
+    return (np.degrees(np.arctan2(x, y)) + 180) % 360
+
+# leg(lat1, lon1, lat2, lon2) from the previous report of the same vessel and voyage to each
+# report, in the frame's row order; NaN for the first report of a voyage and where a position
+# is missing. Reports are put in time order with one sort, and the previous position comes
+# from shifting the sorted arrays by one row within each group.
+def _position_legs(df, leg, group_columns=("Vessel Name", "Voyage No"), time_column="Date/Time", lat_column="Lat", lon_column="Long"):
+    group_columns = [col for col in group_columns if col in df.columns]
+    order_columns = group_columns + ([time_column] if time_column in df.columns else [])
+    order = np.arange(len(df))
+    if order_columns:
+        order = df.reset_index(drop=True).sort_values(order_columns, kind="stable", na_position="last").index.to_numpy()
+
+    lat = parse_positions(df[lat_column].to_numpy()[order])
+    lon = parse_positions(df[lon_column].to_numpy()[order])
+    if group_columns:
+        codes = df[group_columns].iloc[order].groupby(group_columns, sort=False, dropna=False).ngroup().to_numpy()
+    else:
+        codes = np.zeros(len(df), dtype=int)
+
+    values = np.full(len(df), np.nan)
+    if len(df) > 1:
+        same_group = codes[1:] == codes[:-1]
+        values[1:] = np.where(same_group, leg(lat[:-1], lon[:-1], lat[1:], lon[1:]), np.nan)
+
+    result = np.empty(len(df))
+    result[order] = values
+    return result
+
+# Distance in NM from the previous report of the same vessel and voyage (see _position_legs)
+def position_distances(df, **columns):
+    return _position_legs(df, haversine_nm, **columns)
+
+# Course in deg true from the previous report of the same vessel and voyage: the great-circle
+# course on arrival at each report (see _position_legs)
+def position_courses(df, **columns):
+    return _position_legs(df, final_bearing, **columns)
+
+# Position-derived distance of each report and whether it disagrees with the reported
+# distance by more than tolerance_pct of it (at least MIN_DISTANCE_TOLERANCE_NM). Reports
+# without a position-derived distance aren't flagged.
+def check_reported_distance(df, tolerance_pct=10.0, distance_column="DMG", min_tolerance_nm=MIN_DISTANCE_TOLERANCE_NM, **columns):
+    distance = position_distances(df, **columns)
+    reported = pd.to_numeric(df[distance_column], errors="coerce").to_numpy(dtype=float)
+    tolerance = np.maximum(np.abs(reported) * tolerance_pct / 100, min_tolerance_nm)
+    with np.errstate(invalid="ignore"):
+        mismatch = np.abs(distance - reported) > tolerance
+    return pd.DataFrame({"Position Dist (NM)": np.round(distance, 1), "DMG Mismatch": mismatch}, index=df.index)
@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+
+# Data-quality rules for screening noon reports. A rule is a plain dict, so rule sets can be
+# kept as JSON or edited as a table (rules_table / rules_from_table):
+#   {"name": "Slip% range", "kind": "range", "column": "Slip%", "min": -5, "max": 15}
+# Kinds:
+#   range       column within [min, max]; either bound may be left out
+#   divergence  |column - other| <= max
+#   allowed     column is one of values (compared as numbers on numeric columns, so values
+#               typed as text, e.g. in the rules table, still match)
+# Reports with a missing value pass a rule unless it sets "allow_missing": False, and rules
+# with "enabled": False are skipped. evaluate_rules checks every rule over whole columns
+# and combines them into one boolean matrix, so screening costs one pass per rule.
+
+RULE_KINDS = {
+    "range": ["column"],
+    "divergence": ["column", "other", "max"],
+    "allowed": ["column", "values"],
+}
+
+# Starting point for the BOSS page, all switched off so cleaned files stay as before
+DEFAULT_RULES = [
+    {"name": "Slip% range", "kind": "range", "column": "Slip%", "min": -5.0, "max": 15.0, "enabled": False},
+    {"name": "SOG vs STW (Rep)", "kind": "divergence", "column": "SOG", "other": "STW (Rep)", "max": 1.5, "enabled": False},
+    {"name": "BF (Rep) ceiling", "kind": "range", "column": "BF (Rep)", "max": 6.0, "enabled": False},
+    {"name": "Report Type whitelist", "kind": "allowed", "column": "Report Type", "values": ["Noon"], "enabled": False},
+    {"name": "ME Load bounds", "kind": "range", "column": "ME Load", "min": 30.0, "max": 90.0, "enabled": False},
+]
+
+# Enabled rules, checked for the keys their kind needs and for columns missing from columns.
+# Raises ValueError naming the rule, so a bad rule set fails before any report is screened.
+def compile_rules(rules, columns=None):
+    compiled = []
+    for i, rule in enumerate(rules):
+        if not rule.get("enabled", True):
+            continue
+        name = rule.get("name") or f"Rule {i + 1}"
+        kind = rule.get("kind")
+        if kind not in RULE_KINDS:
+            raise ValueError(f"{name}: unknown rule kind {kind!r} (expected one of {', '.join(RULE_KINDS)})")
+        missing = [key for key in RULE_KINDS[kind] if rule.get(key) is None]
+        if missing:
+            raise ValueError(f"{name}: {kind} rules need {', '.join(missing)}")
+        if kind == "range" and rule.get("min") is None and rule.get("max") is None:
+            raise ValueError(f"{name}: range rules need min, max or both")
+        if columns is not None:
+            absent = [rule[key] for key in ("column", "other") if rule.get(key) is not None and rule[key] not in columns]
+            if absent:
+                raise ValueError(f"{name}: no column {', '.join(map(repr, absent))} in the reports")
+        compiled.append({**rule, "name": name})
+    return compiled
+
+# Pass / fail of every compiled rule for every report, as a (rules, reports) boolean array.
+# Numeric columns are converted once however many rules use them.
+def rule_matrix(df, compiled):
+    passed = np.empty((len(compiled), len(df)), dtype=bool)
+    numeric = {}
+
+    def values(column):
+        if column not in numeric:
+            numeric[column] = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=float)
+        return numeric[column]
+
+    for row, rule in zip(passed, compiled):
+        kind = rule["kind"]
+        if kind == "allowed":
+            column = df[rule["column"]]
+            if pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column):
+                allowed = pd.to_numeric(pd.Series(rule["values"], dtype=object), errors="coerce").to_numpy(dtype=float)
+                ok = np.isin(values(rule["column"]), allowed[~np.isnan(allowed)])
+            else:
+                ok = column.isin(rule["values"]).to_numpy()
+            missing = column.isna().to_numpy()
+        else:
+            x = values(rule["column"])
+            with np.errstate(invalid="ignore"):
+                if kind == "range":
+                    ok = np.ones(len(x), dtype=bool)
+                    if rule.get("min") is not None:
+                        ok &= x >= rule["min"]
+                    if rule.get("max") is not None:
+                        ok &= x <= rule["max"]
+                    missing = np.isnan(x)
+                else:  # divergence
+                    difference = np.abs(x - values(rule["other"]))
+                    ok = difference <= rule["max"]
+                    missing = np.isnan(difference)
+        row[:] = ok | (missing & rule.get("allow_missing", True))
+    return passed
+
+# Mask of the reports passing every enabled rule, and a per-rule summary: reports rejected by
+# the rule, and those rejected by it alone (which it would let through if switched off)
+def evaluate_rules(df, rules):
+    compiled = compile_rules(rules, df.columns)
+    passed = rule_matrix(df, compiled)
+    failed = ~passed
+    keep = ~failed.any(axis=0)
+    only = failed & (failed.sum(axis=0) == 1)
+
+    summary = pd.DataFrame({
+        "Rule": [rule["name"] for rule in compiled],
+        "Reports": len(df),
+        "Rejected": failed.sum(axis=1),
+        "Rejected by This Rule Only": only.sum(axis=1),
+    })
+    summary["Rejected %"] = (100 * summary["Rejected"] / len(df)).round(1) if len(df) else 0.0
+    return keep, summary
+
+# Reports passing every enabled rule, and the per-rule summary of evaluate_rules
+def apply_rules(df, rules):
+    keep, summary = evaluate_rules(df, rules)
+    return df[keep], summary
+
+# Rejection summaries of several frames (e.g. one per file) added up rule by rule
+def combine_summaries(summaries):
+    summary = pd.concat(summaries).groupby("Rule", sort=False)[["Reports", "Rejected", "Rejected by This Rule Only"]].sum().reset_index()
+    summary["Rejected %"] = (100 * summary["Rejected"] / summary["Reports"].where(summary["Reports"] > 0)).round(1).fillna(0.0)
+    return summary
+
+# Rules as an editable table (one row per rule; allowed values comma separated) and back
+RULE_TABLE_COLUMNS = ["Enabled", "Rule", "Kind", "Column", "Other Column", "Min", "Max", "Allowed Values", "Allow Missing"]
+
+def rules_table(rules):
+    return pd.DataFrame([{
+        "Enabled": rule.get("enabled", True),
+        "Rule": rule.get("name", ""),
+        "Kind": rule.get("kind"),
+        "Column": rule.get("column"),
+        "Other Column": rule.get("other"),
+        "Min": rule.get("min"),
+        "Max": rule.get("max"),
+        "Allowed Values": ", ".join(map(str, rule.get("values", []))) or None,
+        "Allow Missing": rule.get("allow_missing", True),
+    } for rule in rules], columns=RULE_TABLE_COLUMNS)
+
+def rules_from_table(table):
+    rules = []
+    for row in table.to_dict("records"):
+        if pd.isna(row["Kind"]) or pd.isna(row["Column"]):
+            continue  # Blank rows added in the editor
+        rule = {"name": row["Rule"] if isinstance(row["Rule"], str) and row["Rule"] else None, "kind": row["Kind"], "column": row["Column"],
+                "enabled": bool(row["Enabled"]), "allow_missing": bool(row["Allow Missing"])}
+        if not pd.isna(row["Other Column"]):
+            rule["other"] = row["Other Column"]
+        for key, column in (("min", "Min"), ("max", "Max")):
+            if not pd.isna(row[column]):
+                rule[key] = float(row[column])
+        if not pd.isna(row["Allowed Values"]):
+            rule["values"] = [value.strip() for value in str(row["Allowed Values"]).split(",") if value.strip()]
+        rules.append(rule)
+    return rules
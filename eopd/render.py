@@ -0,0 +1,186 @@
+import io
+from math import radians
+
+import numpy as np
+
+# Polar diagrams of the Current Factor, Wind and STW pages, rendered to PNG bytes.
+# Figures are built with matplotlib.figure.Figure rather than pyplot, so nothing is
+# registered in pyplot's global figure list and each figure is freed once rendered.
+# matplotlib is imported by the drawing functions, i.e. only when a PNG isn't cached yet.
+
+# Same savefig options st.pyplot uses, so cached PNGs look the same as before
+SAVEFIG_OPTIONS = {"bbox_inches": "tight", "dpi": 200, "format": "png"}
+
+# Inputs are rounded to this many decimals in cache keys; far below a pixel on the diagrams
+KEY_DECIMALS = 3
+
+# Cache key for draw(*args): the function name and its arguments, numbers rounded
+def figure_key(draw, args):
+    def rounded(value):
+        if isinstance(value, (list, tuple)):
+            return tuple(rounded(item) for item in value)
+        if isinstance(value, (float, np.floating)):
+            return round(float(value), KEY_DECIMALS) + 0.0  # + 0.0 folds -0.0 into 0.0
+        if isinstance(value, np.integer):
+            return int(value)
+        if isinstance(value, np.ndarray):
+            return (value.shape, np.round(value, KEY_DECIMALS).tobytes())
+        return value
+    return (draw.__name__, rounded(args))
+
+def figure_png(fig):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, **SAVEFIG_OPTIONS)
+    return buffer.getvalue()
+
+# PNG of draw(*args), from cache (an eopd.cache.LRUCache) when the rounded inputs were drawn before
+def render_png(cache, draw, *args):
+    key = figure_key(draw, args)
+    png = cache.get(key)
+    if png is None:
+        png = figure_png(draw(*args))
+        cache.put(key, png)
+    return png
+
+# Heading & STW, COG & SOG and the current vector between them (Current Factor page)
+def current_triangle_figure(heading, stw, cog, sog):
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(3.94, 3.94))
+    ax = fig.add_subplot(projection='polar')
+    max_radius = max(sog, stw) + 1
+
+    # Plot concentric circles
+    ax.set_rmax(max_radius)
+    ax.set_rticks(np.arange(0, max_radius, 2))  # Radial ticks every 2 kts
+    ax.tick_params(axis='y', labelsize='small')  # Reduce font size of the speeds by 50%
+    ax.grid(True)
+
+    # Plot AB (Heading & STW)
+    ax.plot([radians(heading), radians(heading)], [0, stw], label='Heading & STW', color='green')
+    # Plot AC (COG & SOG)
+    ax.plot([radians(cog), radians(cog)], [0, sog], label='COG & SOG', color='blue', linestyle='--')
+    # Plot BC (Current direction & Current speed) starting from B to C
+    ax.annotate('', xy=(radians(cog), sog), xytext=(radians(heading), stw), arrowprops=dict(arrowstyle='->', color='red'))
+    # Plot BC explicitly for legend
+    ax.plot([radians(heading), radians(cog)], [stw, sog], color='red', linestyle=':', label='Current Direction & Speed - Red arrow')
+
+    # Formatting polar plot
+    ax.set_theta_zero_location('N')  # North at top
+    ax.set_theta_direction(-1)  # Clockwise direction
+
+    # Move legend below polar plot
+    ax.legend(loc='upper center', bbox_to_anchor=(0.5, -0.1), fontsize='x-small')
+    return fig
+
+# Polar heatmap of current factor by course (angle) and current speed (radius) for one
+# current direction; factor is indexed [course, current speed] (see eopd.navigation.current_factor_surface)
+def current_factor_surface_figure(courses, current_speeds, factor, sog, current_dir):
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(5, 5))
+    ax = fig.add_subplot(projection='polar')
+    ax.set_theta_zero_location('N')  # North at top
+    ax.set_theta_direction(-1)  # Clockwise direction
+
+    # Green where the current helps, red where it hinders, symmetric around zero
+    limit = max(float(np.abs(factor).max()), 0.01)
+    mesh = ax.pcolormesh(np.radians(courses), current_speeds, factor.T, shading='nearest', cmap='RdYlGn', vmin=-limit, vmax=limit)
+    ax.plot([np.radians(current_dir)] * 2, [0, current_speeds[-1]], color='black', linestyle='--', label='Current Direction')
+    ax.set_title(f"Current Factor (kts) at SOG {sog:.1f} kts by COG and Current Speed", pad=20, fontsize='medium')
+    ax.tick_params(axis='y', labelsize='small')
+    fig.colorbar(mesh, ax=ax, shrink=0.7, pad=0.1)
+    ax.legend(loc='lower center', bbox_to_anchor=(0.5, -0.2), fontsize='x-small')
+    return fig
+
+# Relative wind speed over every heading (angle): a line for a single STW, or a heatmap with
+# STW as the radius for a grid of STW values. rel_speed is indexed [heading, stw] (see
+# eopd.wind.relative_wind_polar); headings with relative wind above limit are outside the
+# shaded area / red contour.
+def relative_wind_map_figure(headings, stws, rel_speed, limit, true_wind_direction, unit):
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(5, 5))
+    ax = fig.add_subplot(projection='polar')
+    ax.set_theta_zero_location('N')  # North at top
+    ax.set_theta_direction(-1)  # Clockwise direction
+    theta = np.radians(headings)
+
+    if len(stws) == 1:
+        speed = rel_speed[:, 0]
+        ax.plot(theta, speed, color='blue', label=f"Relative Wind Speed ({unit}) at STW {stws[0]:g} kts")
+        ax.fill_between(theta, 0, speed, where=speed <= limit, color='green', alpha=0.3, label=f"Relative wind <= {limit:g} {unit}")
+        ax.plot(np.radians(np.arange(361)), np.full(361, limit), color='red', linestyle=':')
+        outer = float(speed.max()) * 1.1
+    else:
+        mesh = ax.pcolormesh(theta, stws, rel_speed.T, shading='nearest', cmap='viridis')
+        fig.colorbar(mesh, ax=ax, shrink=0.7, pad=0.1, label=f"Relative Wind Speed ({unit})")
+        if rel_speed.min() < limit < rel_speed.max():
+            ax.contour(theta, stws, rel_speed.T, levels=[limit], colors='red')
+        ax.plot([], [], color='red', label=f"{limit:g} {unit} limit")
+        ax.set_rlabel_position(135)
+        ax.set_ylim(stws[0] - 0.5, stws[-1] + 0.5)  # Centre at the lowest STW rather than 0 kts
+        outer = float(stws[-1])
+
+    # True wind coming in from its direction
+    ax.annotate('', xy=(np.radians(true_wind_direction), outer * 0.8), xytext=(np.radians(true_wind_direction), outer),
+                arrowprops=dict(facecolor='black', edgecolor='black', arrowstyle='-|>', lw=2))
+    ax.plot([], [], color='black', label='True Wind Direction')
+    ax.set_title("Relative Wind by Heading" + (" and STW (radius, kts)" if len(stws) > 1 else ""), pad=20, fontsize='medium')
+    ax.tick_params(axis='y', labelsize='small')
+    ax.legend(loc='lower center', bbox_to_anchor=(0.5, -0.3), fontsize='x-small')
+    return fig
+
+# Ship vectors and the true wind arrow coming in from the periphery (Wind page).
+# plot_vectors is a tuple of (angle, speed, color, label); true_wind_arrow is (direction, radius, speed).
+def wind_figure(plot_title, wind_speed, plot_vectors, true_wind_arrow):
+    from matplotlib.figure import Figure
+    from matplotlib.patches import Circle
+
+    fig = Figure(figsize=(5, 5))
+    ax = fig.add_subplot(projection='polar')
+    ax.set_title(plot_title, pad=20)
+    ax.set_theta_zero_location('N')
+    ax.set_theta_direction(-1)
+
+    # Plot concentric circles
+    for r in range(0, int(wind_speed) + 5, 5):
+        ax.add_patch(Circle((0, 0), r, transform=ax.transData._b, color="grey", alpha=0.2, fill=False))
+
+    # Plot vectors
+    for angle, speed, color, label in plot_vectors:
+        angle_rad = np.radians(angle)
+        ax.plot([0, angle_rad], [0, speed], color=color, label=label)
+
+    # Plot true wind as an arrow from the periphery towards the center
+    true_wind_angle_rad = np.radians(true_wind_arrow[0])
+    arrow_length = 5  # Fixed length for the arrow
+    start_radius = wind_speed
+    end_radius = start_radius - arrow_length
+    ax.annotate('', xy=(true_wind_angle_rad, end_radius), xytext=(true_wind_angle_rad, start_radius),
+                arrowprops=dict(facecolor='blue', edgecolor='blue', arrowstyle='-|>', lw=2))
+    ax.text(true_wind_angle_rad, start_radius + 1, f'{int(true_wind_arrow[2])} kts', color='blue', fontsize=10, fontweight='bold', ha='left', va='center')
+
+    ax.legend(loc='lower center', bbox_to_anchor=(0.5, -0.25))
+    return fig
+
+# Heading & SOG, current and STW & course vectors (STW page)
+def stw_figure(ship_heading, sog, current_speed, current_direction, stw, course):
+    from matplotlib.figure import Figure
+
+    fig = Figure()
+    ax = fig.add_subplot(111, polar=True)
+
+    # Plot ship's heading
+    ax.quiver(radians(ship_heading), 0, 0, sog, angles='xy', scale_units='xy', scale=1, color='b', label='Ship Heading & SOG')
+
+    # Plot current direction
+    ax.quiver(radians(current_direction), 0, 0, current_speed, angles='xy', scale_units='xy', scale=1, color='r', label='Current Direction & Speed')
+
+    # Plot speed through water
+    ax.quiver(radians(course), 0, 0, stw, angles='xy', scale_units='xy', scale=1, color='g', label='Speed Through Water & Course')
+
+    # Add legend and labels
+    ax.set_title('Ship Speed and Current Diagram')
+    ax.legend(loc='upper right')
+    return fig
@@ -0,0 +1,59 @@
+# Daily consumption / SFOC / power relations used by the SFOC page
+
+def calculate_cons_day(sfoc, power):
+    return sfoc * power / 1000000 * 24
+
+def calculate_sfoc(cons_day, power):
+    return cons_day * 1000000 / 24 / power
+
+def calculate_power(cons_day, sfoc):
+    return cons_day * 1000000 / 24 / sfoc
+
+# Column names in a cleaned BOSS report table; ME Load is in % MCR
+BATCH_COLUMNS = {
+    "me_cons": "ME Cons/day",
+    "me_load": "ME Load",
+}
+
+# Shop-test SFOC (g/kWh) interpolated at each load (% MCR). Loads outside the tested range
+# get NaN rather than an extrapolated value.
+def shop_test_sfoc(load, test_loads, test_sfoc):
+    import numpy as np  # Kept out of the module imports so the single-value page stays light
+
+    order = np.argsort(test_loads)
+    test_loads = np.asarray(test_loads, dtype=float)[order]
+    test_sfoc = np.asarray(test_sfoc, dtype=float)[order]
+    return np.interp(np.asarray(load, dtype=float), test_loads, test_sfoc, left=np.nan, right=np.nan)
+
+# Add power, SFOC and (with a shop-test curve) expected consumption and excess columns for
+# every report. Power comes from power_column (kW) if given, otherwise from the ME Load
+# column and the engine MCR (kW). Reports without a positive power get NaN SFOC instead of
+# a division error; reports more than tolerance_pct above the shop-test consumption are flagged.
+def calculate_sfoc_dataset(df, columns=BATCH_COLUMNS, mcr_kw=None, power_column=None, shop_test=None, tolerance_pct=5.0):
+    import numpy as np
+
+    me_cons = df[columns["me_cons"]].to_numpy(dtype=float)
+    if power_column is not None:
+        power = df[power_column].to_numpy(dtype=float)
+    else:
+        power = df[columns["me_load"]].to_numpy(dtype=float) / 100 * mcr_kw
+    power = np.where(power > 0, power, np.nan)  # NaN compares False, so missing power is masked too
+
+    result = df.copy()
+    result["Power (kW)"] = np.round(power, 0)
+    result["SFOC (g/kWh)"] = np.round(calculate_sfoc(me_cons, power), 1)
+
+    if shop_test is not None:
+        if mcr_kw is None:
+            raise ValueError("mcr_kw is needed to place reports on the shop-test curve")
+        test_loads, test_sfoc = shop_test
+        load = 100 * power / mcr_kw if power_column is not None else df[columns["me_load"]].to_numpy(dtype=float)
+        expected_sfoc = shop_test_sfoc(load, test_loads, test_sfoc)
+        expected_cons = calculate_cons_day(expected_sfoc, power)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            excess_pct = np.where(expected_cons > 0, (me_cons - expected_cons) / expected_cons * 100, np.nan)
+        result["Shop Test SFOC (g/kWh)"] = np.round(expected_sfoc, 1)
+        result["Expected ME Cons/day"] = np.round(expected_cons, 2)
+        result["Excess Cons (%)"] = np.round(excess_pct, 1)
+        result["Excess Flag"] = excess_pct > tolerance_pct
+    return result
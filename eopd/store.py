@@ -0,0 +1,166 @@
+import os
+import threading
+from contextlib import contextmanager
+from urllib.parse import quote, unquote
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from eopd.boss import BOSS_OUTPUT_COLUMNS, BOSS_TEXT_COLUMNS
+
+# Local Parquet dataset of cleaned BOSS reports, laid out hive-style as
+#   <root>/Vessel Name=<vessel>/Month=<YYYY-MM>/part-0.parquet
+# so loads filtered on vessel and month only open the matching files.
+DEFAULT_STORE_DIR = os.environ.get("EOPD_FLEET_STORE", "fleet_store")
+
+PARTITION_COLUMNS = ["Vessel Name", "Month"]
+DEDUP_COLUMNS = ["Vessel Name", "Date/Time"]
+
+PARTITIONING = ds.partitioning(pa.schema([("Vessel Name", pa.string()), ("Month", pa.string())]), flavor="hive")
+
+# Fixed file schema (partition columns live in the directory names), so files written
+# from different uploads always agree on column types
+STORE_SCHEMA = pa.schema([
+    (col, pa.string() if col in BOSS_TEXT_COLUMNS else pa.timestamp("us") if col == "Date/Time" else pa.float64())
+    for col in BOSS_OUTPUT_COLUMNS if col != "Vessel Name"
+])
+
+_write_lock = threading.Lock()
+
+def _partition_dir(root, vessel, month):
+    return os.path.join(root, f"Vessel Name={quote(str(vessel), safe='')}", f"Month={month}")
+
+# Exclusive lock on a partition while its file is rewritten. _write_lock only covers threads of
+# one process, and the app and the CLI (python -m eopd boss --append-to-store) may append to
+# the same partition at once. The .lock file is ignored by dataset scans (dot prefix).
+@contextmanager
+def _partition_lock(part_dir):
+    os.makedirs(part_dir, exist_ok=True)
+    with open(os.path.join(part_dir, ".lock"), "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # Still locked after LK_LOCK's own retries
+                    continue
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+# Cast a cleaned report table to the store's column types and add the Month partition column
+def _to_store_frame(df):
+    df = df.copy()
+    for col in BOSS_OUTPUT_COLUMNS:
+        if col == "Date/Time":
+            df[col] = pd.to_datetime(df[col], errors="coerce").astype("datetime64[us]")
+        elif col in BOSS_TEXT_COLUMNS:
+            df[col] = df[col].astype("str")
+        else:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+
+    # Reports without a vessel or a parseable date can't be partitioned or deduplicated
+    df = df.dropna(subset=DEDUP_COLUMNS)
+    df["Month"] = df["Date/Time"].dt.strftime("%Y-%m")
+    return df
+
+# Append cleaned reports (see eopd.boss.filter_boss_dataframe) to the store. Rows already
+# stored for the same vessel and Date/Time are replaced. Returns the number of rows written.
+# Each partition is read, merged and rewritten under its lock, so appends from several
+# threads or processes all end up in the file.
+def append_reports(df, root=DEFAULT_STORE_DIR):
+    df = _to_store_frame(df)
+    columns = [field.name for field in STORE_SCHEMA]
+
+    with _write_lock:
+        for (vessel, month), part in df.groupby(PARTITION_COLUMNS, sort=False):
+            part_dir = _partition_dir(root, vessel, month)
+            path = os.path.join(part_dir, "part-0.parquet")
+
+            with _partition_lock(part_dir):
+                table = pa.Table.from_pandas(part[columns], schema=STORE_SCHEMA, preserve_index=False)
+                if os.path.exists(path):
+                    table = pa.concat_tables([pq.read_table(path, schema=STORE_SCHEMA), table])
+
+                # Keep the last report per Date/Time, i.e. the newly appended one
+                merged = table.to_pandas()
+                merged = merged.drop_duplicates(subset="Date/Time", keep="last").sort_values("Date/Time")
+                table = pa.Table.from_pandas(merged, schema=STORE_SCHEMA, preserve_index=False)
+
+                # Write next to the partition file and swap it in, so readers never see a partial file
+                tmp_path = os.path.join(part_dir, ".part-0.parquet.tmp")  # Dot prefix: ignored by dataset scans
+                pq.write_table(table, tmp_path)
+                os.replace(tmp_path, path)
+
+    return len(df)
+
+# (Vessel Name, Month) pairs in the store, read from the directory names only
+def list_partitions(root=DEFAULT_STORE_DIR):
+    rows = []
+    if not os.path.isdir(root):
+        return pd.DataFrame(rows, columns=PARTITION_COLUMNS)
+    for vessel_dir in sorted(os.listdir(root)):
+        if not vessel_dir.startswith("Vessel Name="):
+            continue
+        vessel = unquote(vessel_dir.split("=", 1)[1])
+        for month_dir in sorted(os.listdir(os.path.join(root, vessel_dir))):
+            if month_dir.startswith("Month="):
+                rows.append((vessel, month_dir.split("=", 1)[1]))
+    return pd.DataFrame(rows, columns=PARTITION_COLUMNS)
+
+# Dataset and filter expression for a load; see load_reports for the filters
+def _scan(root, vessels, months, start, end):
+    schema = STORE_SCHEMA.append(pa.field("Vessel Name", pa.string())).append(pa.field("Month", pa.string()))
+    dataset = ds.dataset(root, format="parquet", partitioning=PARTITIONING, schema=schema)
+
+    conditions = []
+    if vessels is not None:
+        conditions.append(ds.field("Vessel Name").isin(list(vessels)))
+    if months is not None:
+        conditions.append(ds.field("Month").isin(list(months)))
+    if start is not None:
+        conditions.append(ds.field("Date/Time") >= pa.scalar(pd.Timestamp(start), type=pa.timestamp("us")))
+    if end is not None:
+        conditions.append(ds.field("Date/Time") <= pa.scalar(pd.Timestamp(end), type=pa.timestamp("us")))
+
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return dataset, expression
+
+# Load reports from the store. Vessel and month filters prune partitions by directory
+# before any file is opened; start/end (Date/Time bounds) and columns are pushed down
+# into the Parquet scan.
+def load_reports(root=DEFAULT_STORE_DIR, vessels=None, months=None, start=None, end=None, columns=None):
+    if not os.path.isdir(root):
+        return pd.DataFrame(columns=columns or BOSS_OUTPUT_COLUMNS)
+
+    dataset, expression = _scan(root, vessels, months, start, end)
+    table = dataset.to_table(columns=columns or BOSS_OUTPUT_COLUMNS, filter=expression)
+    return table.to_pandas()
+
+# Same filters as load_reports, but yields the reports as DataFrames of at most batch_size
+# rows, so the whole store never has to fit in memory at once
+def iter_reports(root=DEFAULT_STORE_DIR, vessels=None, months=None, start=None, end=None, columns=None, batch_size=100_000):
+    if not os.path.isdir(root):
+        return
+
+    dataset, expression = _scan(root, vessels, months, start, end)
+    for batch in dataset.to_batches(columns=columns or BOSS_OUTPUT_COLUMNS, filter=expression, batch_size=batch_size):
+        if batch.num_rows:
+            yield batch.to_pandas()
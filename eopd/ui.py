@@ -0,0 +1,87 @@
+import os
+
+import streamlit as st
+
+from eopd.cache import LRUCache
+from eopd.instrument import StageRecorder, configure_logging
+
+# Streamlit widgets shared between pages. This is the only eopd module that imports
+# Streamlit; everything else can be used from scripts and batch jobs.
+# pandas, pyarrow (fleet store) and matplotlib (eopd.render) are imported inside the
+# functions that need them, so pages start without loading them.
+
+# Rendered polar diagrams shared by all sessions; a diagram PNG is roughly 50-150 kB
+FIGURE_CACHE_MAX_MB = 64
+
+@st.cache_resource
+def get_figure_cache():
+    return LRUCache(max_bytes=FIGURE_CACHE_MAX_MB * 2**20)
+
+# Show the figure drawn by draw(*args) (see eopd.render). The PNG is cached on the rounded
+# inputs, so repeated slider positions are served without drawing anything.
+def cached_figure(draw, *args):
+    from eopd.render import render_png
+
+    st.image(render_png(get_figure_cache(), draw, *args), width="stretch", output_format="PNG")
+
+# Sidebar hit rate of the shared figure cache
+def figure_cache_metric():
+    cache = get_figure_cache()
+    st.sidebar.metric("Figure cache hit rate", f"{cache.hit_rate:.0%}", help=f"{len(cache)} figures, {cache.total_bytes / 2**20:.1f} / {FIGURE_CACHE_MAX_MB} MB cached, {cache.hits} hits, {cache.misses} misses")
+
+# Pick vessels and a month range from the fleet store and load the matching reports.
+# Returns None while the store is empty or nothing is selected. The reports come back with
+# compact dtypes (see eopd.boss.compact_boss_dataframe) since pages keep them in caches.
+def fleet_store_loader(key):
+    from eopd.boss import compact_boss_dataframe, memory_bytes
+    from eopd.store import list_partitions, load_reports
+
+    partitions = list_partitions()
+    if partitions.empty:
+        st.info("The fleet store is empty. Append cleaned reports from the BOSS Raw Data Processor first.")
+        return None
+
+    vessel_options = sorted(partitions["Vessel Name"].unique())
+    vessels = st.multiselect("Vessels", vessel_options, default=vessel_options, key=f"{key}_vessels")
+    month_options = sorted(partitions.loc[partitions["Vessel Name"].isin(vessels), "Month"].unique())
+    if not month_options:
+        return None
+
+    if len(month_options) > 1:
+        first, last = st.select_slider("Months", options=month_options, value=(month_options[0], month_options[-1]), key=f"{key}_months")
+    else:
+        first = last = month_options[0]
+    months = [month for month in month_options if first <= month <= last]
+
+    df = load_reports(vessels=vessels, months=months)
+    before = memory_bytes(df)
+    df = compact_boss_dataframe(df)
+    st.caption(f"Loaded {len(df)} reports for {len(vessels)} vessels, {first} to {last} "
+               f"({memory_bytes(df) / 2**20:.1f} MB, {before / 2**20:.1f} MB before compacting dtypes)")
+    return df
+
+# Sidebar switch for per-stage timing / memory instrumentation (default on with EOPD_INSTRUMENT=1)
+def instrumentation_recorder(page):
+    enabled = st.sidebar.toggle(
+        "Performance instrumentation",
+        value=os.environ.get("EOPD_INSTRUMENT") == "1",
+        key="eopd_instrument",
+        help="Times each processing stage, and measures the peak memory of stages run in worker processes. Adds overhead while on.",
+    )
+    return StageRecorder(page, enabled=enabled, trace_memory=False)
+
+# Show the recorded stages in a sidebar panel and write them to the server log as JSON lines
+def instrumentation_panel(recorder):
+    if not recorder.enabled or not recorder.records:
+        return
+    import pandas as pd
+
+    configure_logging()
+    recorder.log()
+
+    df = pd.DataFrame(recorder.records).drop(columns="page")
+    df["ms"] = (df.pop("seconds") * 1000).round(1)
+    df["peak MB"] = pd.to_numeric(df.pop("peak_mb")).round(1)  # Empty for stages run on the server
+    with st.sidebar.expander("Performance", expanded=True):
+        st.dataframe(df, hide_index=True)
+        st.caption(f"Total {df['ms'].sum():.0f} ms")
@@ -0,0 +1,139 @@
+import numpy as np
+
+# True / relative wind kernels used by the Wind Direction page. They accept plain
+# numbers or arrays, so whole report columns convert in one pass.
+
+# Utility function to normalize angles
+def normalize_angle(angle):
+    return angle % 360
+
+# Function to convert relative wind (direction off the bow) to true wind
+def calculate_true_wind(relative_wind_speed, relative_wind_direction, ship_speed, ship_heading):
+    # Convert angles from degrees to radians; the relative direction is turned to a compass
+    # bearing first so both vectors are in the same frame
+    RWD_rad = np.radians(relative_wind_direction + ship_heading)
+    SH_rad = np.radians(ship_heading)
+
+    # Calculate x and y components of the relative wind vector
+    RWx = relative_wind_speed * np.sin(RWD_rad)
+    RWy = relative_wind_speed * np.cos(RWD_rad)
+
+    # Calculate x and y components of the ship's motion vector
+    SMx = ship_speed * np.sin(SH_rad)
+    SMy = ship_speed * np.cos(SH_rad)
+
+    # Calculate x and y components of the true wind vector
+    TWx = RWx - SMx
+    TWy = RWy - SMy
+
+    # Calculate true wind speed
+    true_wind_speed = np.hypot(TWx, TWy)
+
+    # Calculate true wind direction (direction wind is coming from)
+    true_wind_direction = normalize_angle(np.degrees(np.arctan2(TWx, TWy)))
+
+    return true_wind_speed, true_wind_direction
+
+# Function to convert true wind to relative wind
+def calculate_relative_wind(true_wind_speed, true_wind_direction, ship_speed, ship_heading):
+    # Convert angles from degrees to radians
+    TWD_rad = np.radians(true_wind_direction)
+    SH_rad = np.radians(ship_heading)
+
+    # Calculate x and y components of the true wind vector
+    TWx = true_wind_speed * np.sin(TWD_rad)
+    TWy = true_wind_speed * np.cos(TWD_rad)
+
+    # Calculate x and y components of the ship's motion vector
+    SMx = ship_speed * np.sin(SH_rad)
+    SMy = ship_speed * np.cos(SH_rad)
+
+    # Calculate x and y components of the relative wind vector
+    RWx = TWx + SMx
+    RWy = TWy + SMy
+
+    # Calculate relative wind speed
+    relative_wind_speed = np.hypot(RWx, RWy)
+
+    # Calculate relative wind direction
+    relative_wind_direction = normalize_angle(np.degrees(np.arctan2(RWx, RWy)) - ship_heading)
+
+    return relative_wind_speed, relative_wind_direction
+
+# Headings of the polar wind map, 1 deg resolution
+POLAR_HEADINGS = np.arange(0, 360)
+
+# Relative wind speed and direction for every heading x STW in one broadcast
+# calculate_relative_wind call. Arrays are indexed [heading, stw].
+def relative_wind_polar(true_wind_speed, true_wind_direction, stw, headings=POLAR_HEADINGS):
+    heading = np.asarray(headings, dtype=float)[:, None]
+    ship_speed = np.atleast_1d(np.asarray(stw, dtype=float))[None, :]
+    return calculate_relative_wind(true_wind_speed, true_wind_direction, ship_speed, heading)
+
+# Contiguous runs of headings where mask is True, as (first, last) pairs in degrees. A run
+# crossing north (e.g. 350 to 10) is returned as one pair.
+def heading_ranges(mask, headings=POLAR_HEADINGS):
+    mask = np.asarray(mask, dtype=bool)
+    if mask.all():
+        return [(int(headings[0]), int(headings[-1]))]
+    edges = np.diff(mask.astype(int))
+    starts = list(np.flatnonzero(edges == 1) + 1)
+    ends = list(np.flatnonzero(edges == -1))
+    if mask[0]:
+        starts.insert(0, 0)
+    if mask[-1]:
+        ends.append(len(mask) - 1)
+    ranges = [(int(headings[start]), int(headings[end])) for start, end in zip(starts, ends)]
+    if len(ranges) > 1 and mask[0] and mask[-1]:
+        ranges = [(ranges[-1][0], ranges[0][1])] + ranges[1:-1]
+    return ranges
+
+KNOTS_PER_MS = 1.94384
+
+# Function to convert Beaufort force to wind speed in m/sec (WMO empirical scale)
+def beaufort_to_ms(bf):
+    return 0.836 * np.power(np.clip(bf, 0, None), 1.5)
+
+# Course between consecutive report positions, added by add_position_course
+POSITION_COURSE_COLUMN = "Course (Pos)"
+
+# Column names produced by the BOSS Raw Data Processor. BOSS reports have no heading, so the
+# course from their positions stands in for it.
+DATASET_COLUMNS = {
+    "wind_dir": "Wind Dir (R) (Rep)",
+    "wind_speed": "BF (Rep)",
+    "stw": "STW (Rep)",
+    "heading": POSITION_COURSE_COLUMN,
+}
+
+# Add the course from the previous report's position to each report (eopd.positions), as the
+# heading of reports without one. Needs Lat and Long; NaN for the first report of a voyage.
+def add_position_course(df, lat_column="Lat", lon_column="Long"):
+    from eopd.positions import position_courses  # pandas / pyarrow only load for dataset mode
+
+    result = df.copy()
+    result[POSITION_COURSE_COLUMN] = position_courses(df, lat_column=lat_column, lon_column=lon_column).round(0)
+    return result
+
+# Function to add true wind speed / direction columns for every report row
+def calculate_true_wind_dataset(df, columns=DATASET_COLUMNS, wind_speed_input="Beaufort", wind_speed_output="knots"):
+    wind_dir = df[columns["wind_dir"]].to_numpy(dtype=float)
+    wind_speed = df[columns["wind_speed"]].to_numpy(dtype=float)
+    stw = df[columns["stw"]].to_numpy(dtype=float)
+    heading = df[columns["heading"]].to_numpy(dtype=float)
+
+    # Bring the relative wind speed to knots
+    if wind_speed_input == "Beaufort":
+        wind_speed = beaufort_to_ms(wind_speed) * KNOTS_PER_MS
+    elif wind_speed_input == "m/sec":
+        wind_speed = wind_speed * KNOTS_PER_MS
+
+    true_wind_speed, true_wind_dir = calculate_true_wind(wind_speed, wind_dir, stw, heading)
+    if wind_speed_output == "m/sec":
+        true_wind_speed = true_wind_speed / KNOTS_PER_MS
+
+    unit = "kts" if wind_speed_output == "knots" else "m/sec"
+    result = df.copy()
+    result[f"True Wind Speed ({unit})"] = np.round(true_wind_speed, 1)
+    result["True Wind Dir"] = np.round(true_wind_dir, 0)
+    return result
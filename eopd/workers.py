@@ -0,0 +1,17 @@
+import os
+
+# Default worker count for the process pools (BOSS files, fleet curve fits)
+def default_workers():
+    return os.cpu_count() or 1
+
+# Worker count of the app's shared BOSS job queue: $EOPD_WORKERS, else default_workers().
+# Read once at start-up; the pool isn't resized while the app runs.
+def configured_workers():
+    value = os.environ.get("EOPD_WORKERS")
+    if not value:
+        return default_workers()
+    try:
+        workers = int(value)
+    except ValueError:
+        raise ValueError(f"EOPD_WORKERS must be a whole number of workers, not {value!r}") from None
+    return max(1, workers)
@@ -1,83 +1,34 @@
 import streamlit as st
-import numpy as np
-import matplotlib.pyplot as plt
-from math import radians, degrees, sin, cos, atan2, sqrt
-
-# Helper function to calculate Speed Through Water (STW) and heading
-def calculate_stw(cog, sog, current_dir, current_speed):
-    # Convert angles to radians
-    cog_rad = radians(cog)
-    current_dir_rad = radians(current_dir)
-
-    # Resolve SOG and current speed into x and y components
-    sog_x = sog * cos(cog_rad)
-    sog_y = sog * sin(cog_rad)
-    current_x = current_speed * cos(current_dir_rad)
-    current_y = current_speed * sin(current_dir_rad)
-
-    # Calculate STW components
-    stw_x = sog_x - current_x
-    stw_y = sog_y - current_y
-
-    # Calculate STW and heading
-    stw = sqrt(stw_x**2 + stw_y**2)
-    heading = degrees(atan2(stw_y, stw_x)) % 360
-
-    return stw, heading, sog_x, sog_y, current_x, current_y
-
-# Helper function to calculate Speed Over Ground (SOG) and Course Over Ground (COG)
-def calculate_sog(stw, heading, current_dir, current_speed):
-    # Convert angles to radians
-    heading_rad = radians(heading)
-    current_dir_rad = radians(current_dir)
-
-    # Resolve STW and current speed into x and y components
-    stw_x = stw * cos(heading_rad)
-    stw_y = stw * sin(heading_rad)
-    current_x = current_speed * cos(current_dir_rad)
-    current_y = current_speed * sin(current_dir_rad)
-
-    # Calculate SOG components
-    sog_x = stw_x + current_x
-    sog_y = stw_y + current_y
-
-    # Calculate SOG and COG
-    sog = sqrt(sog_x**2 + sog_y**2)
-    cog = degrees(atan2(sog_y, sog_x)) % 360
-
-    return sog, cog
-
-# Helper function to calculate Current Direction and Speed
-def calculate_current(sog, cog, stw, heading):
-    # Convert angles to radians
-    cog_rad = radians(cog)
-    heading_rad = radians(heading)
-
-    # Resolve SOG and STW into x and y components
-    sog_x = sog * cos(cog_rad)
-    sog_y = sog * sin(cog_rad)
-    stw_x = stw * cos(heading_rad)
-    stw_y = stw * sin(heading_rad)
-
-    # Calculate current components
-    current_x = sog_x - stw_x
-    current_y = sog_y - stw_y
-
-    # Calculate current speed and direction
-    current_speed = sqrt(current_x**2 + current_y**2)
-    current_dir = degrees(atan2(current_y, current_x)) % 360
-
-    return current_dir, current_speed
+from eopd.render import current_triangle_figure, current_factor_surface_figure
+from eopd.ui import instrumentation_recorder, instrumentation_panel, cached_figure, figure_cache_metric
+from eopd.navigation import calculate_stw, calculate_sog, calculate_current, calculate_stw_batch, BATCH_COLUMNS
+from eopd.navigation import current_factor_surface, surface_index, SURFACE_ANGLES, SURFACE_CURRENT_SPEEDS, SURFACE_FACTOR_TOLERANCE
+
+# Helper function to load a CSV / XLSX upload into a DataFrame
+def load_batch_file(uploaded_file):
+    import pandas as pd  # Only batch mode needs pandas
+
+    if uploaded_file.name.lower().endswith(".csv"):
+        return pd.read_csv(uploaded_file)
+    return pd.read_excel(uploaded_file)
+
+# Current factor over every COG x current direction x current speed for one SOG, computed once per SOG
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_current_factor_surface(sog):
+    return current_factor_surface(sog)
 
 # Streamlit UI
 def main():
     st.title("Navigator's App - Wind & Current calculator ")
+    recorder = instrumentation_recorder("current_factor")
 
     # Selection of calculation type
     calculation_type = st.radio("Select Calculation Type:", [
         "Calculate Heading & Speed Through Water (STW)",
         "Calculate Course Over Ground (COG) & Speed Over Ground (SOG)",
-        "Calculate Current Direction & Speed"
+        "Calculate Current Direction & Speed",
+        "Batch: Heading, STW & Current Factor from File",
+        "Current Factor Surface: All Courses & Currents"
     ])
 
     # Layout
@@ -95,40 +46,9 @@ def main():
         stw, heading, sog_x, sog_y, current_x, current_y = calculate_stw(cog, sog, current_dir, current_speed)
         current_factor = sog - stw
 
-        with right_col:
-            # Plotting polar diagram
-            fig, ax = plt.subplots(subplot_kw={'projection': 'polar'}, figsize=(3.94, 3.94))
-            max_radius = max(sog, stw) + 1
-
-            # Plot concentric circles
-            ax.set_rmax(max_radius)
-            ax.set_rticks(np.arange(0, max_radius, 2))
-            ax.tick_params(axis='y', labelsize='small')  # Reduce font size of the speeds by 50%  # Radial ticks every 2 kts
-            ax.grid(True)
-            
-            # Plot vectors
-            # Plot AB (Heading & STW)
-            ax.plot([radians(heading), radians(heading)], [0, stw], label='Heading & STW', color='green')
-            # Plot AC (COG & SOG)
-            ax.plot([radians(cog), radians(cog)], [0, sog], label='COG & SOG', color='blue', linestyle='--')
-            # Plot BC (Current direction & Current speed) starting from B to C
-            bx_angle = heading
-            bx_radius = stw
-            cx_angle = cog
-            cx_radius = sog
-            ax.annotate('', xy=(radians(cx_angle), cx_radius), xytext=(radians(bx_angle), bx_radius), arrowprops=dict(arrowstyle='->', color='red'))
-            # Plot BC (Current direction & Current speed) explicitly for legend
-            ax.plot([radians(bx_angle), radians(cx_angle)], [bx_radius, cx_radius], color='red', linestyle=':', label='Current Direction & Speed - Red arrow')
-
-            # Formatting polar plot
-            ax.set_theta_zero_location('N')  # North at top
-            ax.set_theta_direction(-1)  # Clockwise direction
-            
-            # Move legend below polar plot
-            ax.legend(loc='upper center', bbox_to_anchor=(0.5, -0.1), fontsize='x-small')
-
-            # Show plot
-            st.pyplot(fig)
+        with right_col, recorder.stage("render"):
+            # Polar diagram, rendered once per rounded set of inputs
+            cached_figure(current_triangle_figure, heading, stw, cog, sog)
 
             # Display results below the polar plot
             st.metric("Ship's Heading & Speed Through Water (STW)", f"{heading:.0f} deg / {stw:.1f} kts")
@@ -147,40 +67,9 @@ def main():
         sog, cog = calculate_sog(stw, heading, current_dir, current_speed)
         current_factor = sog - stw
 
-        with right_col:
-            # Plotting polar diagram
-            fig, ax = plt.subplots(subplot_kw={'projection': 'polar'}, figsize=(3.94, 3.94))
-            max_radius = max(sog, stw) + 1
-
-            # Plot concentric circles
-            ax.set_rmax(max_radius)
-            ax.set_rticks(np.arange(0, max_radius, 2))
-            ax.tick_params(axis='y', labelsize='small')  # Reduce font size of the speeds by 50%  # Radial ticks every 2 kts
-            ax.grid(True)
-            
-            # Plot vectors
-            # Plot AB (Heading & STW)
-            ax.plot([radians(heading), radians(heading)], [0, stw], label='Heading & STW', color='green')
-            # Plot AC (COG & SOG)
-            ax.plot([radians(cog), radians(cog)], [0, sog], label='COG & SOG', color='blue', linestyle='--')
-            # Plot BC (Current direction & Current speed) starting from B to C
-            bx_angle = heading
-            bx_radius = stw
-            cx_angle = cog
-            cx_radius = sog
-            ax.annotate('', xy=(radians(cx_angle), cx_radius), xytext=(radians(bx_angle), bx_radius), arrowprops=dict(arrowstyle='->', color='red'))
-            # Plot BC (Current direction & Current speed) explicitly for legend
-            ax.plot([radians(bx_angle), radians(cx_angle)], [bx_radius, cx_radius], color='red', linestyle=':', label='Current Direction & Speed - Red arrow')
-
-            # Formatting polar plot
-            ax.set_theta_zero_location('N')  # North at top
-            ax.set_theta_direction(-1)  # Clockwise direction
-            
-            # Move legend below polar plot
-            ax.legend(loc='upper center', bbox_to_anchor=(0.5, -0.1), fontsize='x-small')
-
-            # Show plot
-            st.pyplot(fig)
+        with right_col, recorder.stage("render"):
+            # Polar diagram, rendered once per rounded set of inputs
+            cached_figure(current_triangle_figure, heading, stw, cog, sog)
 
             # Display results below the polar plot
             st.metric("Course Over Ground (COG) & Speed Over Ground (SOG)", f"{cog:.0f} deg / {sog:.1f} kts")
@@ -199,45 +88,76 @@ def main():
         current_dir, current_speed = calculate_current(sog, cog, stw, heading)
         current_factor = sog - stw
 
-        with right_col:
-            # Plotting polar diagram
-            fig, ax = plt.subplots(subplot_kw={'projection': 'polar'}, figsize=(3.94, 3.94))
-            max_radius = max(sog, stw) + 1
-
-            # Plot concentric circles
-            ax.set_rmax(max_radius)
-            ax.set_rticks(np.arange(0, max_radius, 2))
-            ax.tick_params(axis='y', labelsize='small')  # Reduce font size of the speeds by 50%  # Radial ticks every 2 kts
-            ax.grid(True)
-            
-            # Plot vectors
-            # Plot AB (Heading & STW)
-            ax.plot([radians(heading), radians(heading)], [0, stw], label='Heading & STW', color='green')
-            # Plot AC (COG & SOG)
-            ax.plot([radians(cog), radians(cog)], [0, sog], label='COG & SOG', color='blue', linestyle='--')
-            # Plot BC (Current direction & Current speed) starting from B to C
-            bx_angle = heading
-            bx_radius = stw
-            cx_angle = cog
-            cx_radius = sog
-            ax.annotate('', xy=(radians(cx_angle), cx_radius), xytext=(radians(bx_angle), bx_radius), arrowprops=dict(arrowstyle='->', color='red'))
-            # Plot BC (Current direction & Current speed) explicitly for legend
-            ax.plot([radians(bx_angle), radians(cx_angle)], [bx_radius, cx_radius], color='red', linestyle=':', label='Current Direction & Speed - Red arrow')
-
-            # Formatting polar plot
-            ax.set_theta_zero_location('N')  # North at top
-            ax.set_theta_direction(-1)  # Clockwise direction
-            
-            # Move legend below polar plot
-            ax.legend(loc='upper center', bbox_to_anchor=(0.5, -0.1), fontsize='x-small')
-
-            # Show plot
-            st.pyplot(fig)
+        with right_col, recorder.stage("render"):
+            # Polar diagram, rendered once per rounded set of inputs
+            cached_figure(current_triangle_figure, heading, stw, cog, sog)
 
             # Display results below the polar plot
             st.metric("Current Direction & Speed", f"{current_dir:.0f} deg / {current_speed:.1f} kts")
             current_factor_color = f"<span style='font-size: 2.25em; font-weight: bold; color: {'green' if current_factor > 0 else 'red'};'>{current_factor:.1f} kts</span>"
             st.markdown(f"Current Factor: {current_factor_color}", unsafe_allow_html=True)
 
+    elif calculation_type == "Batch: Heading, STW & Current Factor from File":
+        st.write("Upload a CSV/XLSX with one row per report. Heading, STW and Current Factor are calculated for every row at once.")
+        uploaded_file = st.file_uploader("Upload reports file", type=["csv", "xlsx"])
+
+        if uploaded_file:
+            df = load_batch_file(uploaded_file)
+
+            # Map the file's columns onto the calculation inputs. Inputs whose usual column isn't
+            # in the file are left unset rather than guessed, so they have to be chosen by hand.
+            columns = {}
+            map_cols = st.columns(len(BATCH_COLUMNS))
+            for map_col, (key, default) in zip(map_cols, BATCH_COLUMNS.items()):
+                options = list(df.columns)
+                index = options.index(default) if default in options else None
+                with map_col:
+                    columns[key] = st.selectbox(f"{default} column", options, index=index, placeholder="Choose a column", key=f"batch_{key}")
+
+            unmapped = [BATCH_COLUMNS[key] for key, column in columns.items() if column is None]
+            if unmapped:
+                st.error(f"No column chosen for {', '.join(unmapped)}. Pick the matching column above.")
+                st.stop()
+
+            try:
+                result = calculate_stw_batch(df, columns)
+            except ValueError as e:
+                st.error(f"The chosen columns must be numeric: {e}")
+                st.stop()
+
+            st.write(f"Processed {len(result)} rows")
+            st.dataframe(result)
+            st.download_button(label="Download Results (CSV)", data=result.to_csv(index=False), file_name="current_factor_batch.csv", mime="text/csv")
+
+    elif calculation_type == "Current Factor Surface: All Courses & Currents":
+        with left_col:
+            # Inputs; the surface depends on SOG only, the other sliders just pick a point or slice
+            sog = st.slider("Speed Over Ground (SOG) [kts]", 6.0, 30.0, step=0.5, key="surface_sog")
+            current_dir = st.slider("Current Direction [deg]", 0, 360, step=5, key="surface_current_dir")
+            cog = st.slider("Ship's Course Over Ground (COG) [deg]", 0, 360, step=5, key="surface_cog")
+            current_speed = st.slider("Current Speed [kts]", 0.0, 5.0, step=0.25, key="surface_current_speed")
+
+        with recorder.stage("surface"):
+            factor, stw, heading = cached_current_factor_surface(sog)
+        i, j, k = surface_index(SURFACE_ANGLES, cog), surface_index(SURFACE_ANGLES, current_dir), surface_index(SURFACE_CURRENT_SPEEDS, current_speed)
+
+        with right_col, recorder.stage("render"):
+            # Heatmap for the selected current direction, rendered once per SOG and direction
+            cached_figure(current_factor_surface_figure, SURFACE_ANGLES, SURFACE_CURRENT_SPEEDS, factor[:, j, :], sog, current_dir)
+
+            # Selected point and the best course for this current, looked up on the surface
+            courses = factor[:, j, k]
+            best = courses.argmax()
+            st.metric("Ship's Heading & Speed Through Water (STW)", f"{heading[i, j, k]:.0f} deg / {stw[i, j, k]:.1f} kts")
+            current_factor_color = f"<span style='font-size: 2.25em; font-weight: bold; color: {'green' if factor[i, j, k] > 0 else 'red'};'>{factor[i, j, k]:.1f} kts</span>"
+            st.markdown(f"Current Factor: {current_factor_color}", unsafe_allow_html=True)
+            if courses.max() - courses.min() <= SURFACE_FACTOR_TOLERANCE:
+                st.write("Most favourable COG for this current: no preference (same current factor on every course)")
+            else:
+                st.write(f"Most favourable COG for this current: {SURFACE_ANGLES[best]} deg ({courses[best]:+.1f} kts)")
+
+    figure_cache_metric()
+    instrumentation_panel(recorder)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
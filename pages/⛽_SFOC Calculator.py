@@ -1,21 +1,14 @@
 import streamlit as st
+from eopd.sfoc import calculate_cons_day, calculate_sfoc, calculate_power, calculate_sfoc_dataset, BATCH_COLUMNS
+from eopd.ui import fleet_store_loader
 
 st.set_page_config(page_icon="⛽",)
 
-def calculate_cons_day(sfoc, power):
-    return sfoc * power / 1000000 * 24
-
-def calculate_sfoc(cons_day, power):
-    return cons_day * 1000000 / 24 / power
-
-def calculate_power(cons_day, sfoc):
-    return cons_day * 1000000 / 24 / sfoc
-
 st.title('SFOC Calculation App')
 st.write('Select an option to perform the respective calculation.')
 
 # User option selection
-option = st.radio('Select Calculation', ('Calculate Cons/Day', 'Calculate SFOC', 'Calculate Power'))
+option = st.radio('Select Calculation', ('Calculate Cons/Day', 'Calculate SFOC', 'Calculate Power', 'Batch: SFOC & Excess Consumption'))
 
 if option == 'Calculate Cons/Day':
     st.header('Calculate Cons/Day')
@@ -39,4 +32,64 @@ elif option == 'Calculate Power':
     sfoc = st.number_input('Enter SFOC (kg/kWh):', min_value=0.0, format='%f')
     if st.button('Calculate'):
         result = calculate_power(cons_day, sfoc)
-        st.write(f'Power: {result:.1f} kWh')
\ No newline at end of file
+        st.write(f'Power: {result:.1f} kWh')
+
+# Batch mode screens a whole report table at once against the engine's shop-test curve
+elif option == 'Batch: SFOC & Excess Consumption':
+    import pandas as pd  # Only the batch mode needs pandas
+
+    st.header('Batch SFOC & Excess Consumption')
+    st.write('Upload a cleaned BOSS file (or any CSV/XLSX with ME consumption and ME load or power columns), or load reports from the fleet store.')
+    source = st.radio('Reports Source:', ('Upload file', 'Fleet store'), horizontal=True, key='sfoc_source')
+
+    df = None
+    if source == 'Fleet store':
+        df = fleet_store_loader(key='sfoc_store')
+    else:
+        uploaded_file = st.file_uploader('Upload reports file', type=['csv', 'xlsx'])
+        if uploaded_file:
+            if uploaded_file.name.lower().endswith('.csv'):
+                df = pd.read_csv(uploaded_file)
+            else:
+                df = pd.read_excel(uploaded_file)
+
+    if df is not None and not df.empty:
+        # Columns missing from the file are left unset rather than guessed, so they have to be chosen by hand
+        options = list(df.columns)
+        map_col1, map_col2 = st.columns(2)
+        with map_col1:
+            cons_default = BATCH_COLUMNS['me_cons']
+            cons_column = st.selectbox(f'{cons_default} column', options, index=options.index(cons_default) if cons_default in options else None,
+                                       placeholder='Choose a column', key='sfoc_me_cons')
+            power_source = st.radio('Power from:', ('ME Load (% MCR)', 'Power column (kW)'), horizontal=True, key='sfoc_power_source')
+        with map_col2:
+            power_default = BATCH_COLUMNS['me_load'] if power_source == 'ME Load (% MCR)' else 'Power'
+            power_column = st.selectbox(f'{power_source} column', options, index=options.index(power_default) if power_default in options else None,
+                                        placeholder='Choose a column', key='sfoc_power_column')
+            mcr_kw = st.number_input('Engine MCR (kW):', min_value=1.0, value=10000.0, step=100.0, key='sfoc_mcr')
+
+        unmapped = [name for name, column in ((cons_default, cons_column), (power_source, power_column)) if column is None]
+        if unmapped:
+            st.error(f"No column chosen for {', '.join(unmapped)}. Pick the matching column above.")
+            st.stop()
+
+        # Shop-test SFOC curve of the engine, interpolated at every report's load
+        st.write('Shop-test SFOC curve (edit to match the engine):')
+        shop_test = st.data_editor(pd.DataFrame({'Load (% MCR)': [25.0, 50.0, 75.0, 85.0, 100.0], 'SFOC (g/kWh)': [186.0, 175.0, 169.0, 170.0, 173.0]}), num_rows='dynamic', key='sfoc_shop_test').dropna()
+        tolerance_pct = st.number_input('Flag reports above expected consumption by more than (%):', min_value=0.0, value=5.0, step=0.5, key='sfoc_tolerance')
+
+        columns = {'me_cons': cons_column, 'me_load': power_column}
+        curve = (shop_test['Load (% MCR)'].to_numpy(), shop_test['SFOC (g/kWh)'].to_numpy()) if len(shop_test) >= 2 else None
+        try:
+            result = calculate_sfoc_dataset(df, columns, mcr_kw, power_column if power_source == 'Power column (kW)' else None, curve, tolerance_pct)
+        except ValueError as e:
+            st.error(f'The chosen columns must be numeric: {e}')
+            st.stop()
+
+        st.write(f'Processed {len(result)} rows')
+        if curve is not None:
+            flagged = int(result['Excess Flag'].sum())
+            st.metric('Reports flagged for excess consumption', f'{flagged} of {len(result)}')
+            st.caption(f"{int(result['SFOC (g/kWh)'].isna().sum())} reports without a positive power are left blank.")
+        st.dataframe(result)
+        st.download_button(label='Download Results (CSV)', data=result.to_csv(index=False), file_name='sfoc_batch.csv', mime='text/csv')
\ No newline at end of file
@@ -2,78 +2,125 @@
 # streamlit run wind_app.py
 
 import streamlit as st
-import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.patches import Circle, FancyArrow
-import math
+from eopd.render import wind_figure, relative_wind_map_figure
+from eopd.ui import fleet_store_loader, instrumentation_recorder, instrumentation_panel, cached_figure, figure_cache_metric
+from eopd.wind import calculate_true_wind, calculate_relative_wind, calculate_true_wind_dataset, add_position_course, DATASET_COLUMNS, POSITION_COURSE_COLUMN
+from eopd.wind import relative_wind_polar, heading_ranges, POLAR_HEADINGS, KNOTS_PER_MS
 
 st.set_page_config(page_icon="💨",)
 
-# Utility function to normalize angles
-def normalize_angle(angle):
-    return angle % 360
-
-# Function to convert relative wind to true wind
-def calculate_true_wind(relative_wind_speed, relative_wind_direction, ship_speed, ship_heading):
-    # Convert angles from degrees to radians
-    RWD_rad = math.radians(relative_wind_direction)
-    SH_rad = math.radians(ship_heading)
-
-    # Calculate x and y components of the relative wind vector
-    RWx = relative_wind_speed * math.sin(RWD_rad)
-    RWy = relative_wind_speed * math.cos(RWD_rad)
-
-    # Calculate x and y components of the ship's motion vector
-    SMx = ship_speed * math.sin(SH_rad)
-    SMy = ship_speed * math.cos(SH_rad)
-
-    # Calculate x and y components of the true wind vector
-    TWx = RWx - SMx
-    TWy = RWy - SMy
-
-    # Calculate true wind speed
-    true_wind_speed = math.sqrt(TWx ** 2 + TWy ** 2)
-
-    # Calculate true wind direction (direction wind is coming from)
-    true_wind_direction = normalize_angle(math.degrees(math.atan2(TWx, TWy)))
-
-    return true_wind_speed, true_wind_direction
-
-# Function to convert true wind to relative wind
-def calculate_relative_wind(true_wind_speed, true_wind_direction, ship_speed, ship_heading):
-    # Convert angles from degrees to radians
-    TWD_rad = math.radians(true_wind_direction)
-    SH_rad = math.radians(ship_heading)
-
-    # Calculate x and y components of the true wind vector
-    TWx = true_wind_speed * math.sin(TWD_rad)
-    TWy = true_wind_speed * math.cos(TWD_rad)
-
-    # Calculate x and y components of the ship's motion vector
-    SMx = ship_speed * math.sin(SH_rad)
-    SMy = ship_speed * math.cos(SH_rad)
-
-    # Calculate x and y components of the relative wind vector
-    RWx = TWx + SMx
-    RWy = TWy + SMy
-
-    # Calculate relative wind speed
-    relative_wind_speed = math.sqrt(RWx**2 + RWy**2)
-
-    # Calculate relative wind direction
-    relative_wind_direction = normalize_angle(math.degrees(math.atan2(RWx, RWy)) - ship_heading)
-
-    return relative_wind_speed, relative_wind_direction
-
 # Streamlit UI
 st.title("Wind Conversion: True Wind <-> Relative Wind")
+recorder = instrumentation_recorder("wind")
 
 col1, col2 = st.columns([1, 2])
 
 with col1:
     # Select conversion type
-    conversion_type = st.selectbox("Select Conversion Type:", ["Relative Wind to True Wind", "True Wind to Relative Wind"], key="conversion_type")
+    conversion_type = st.selectbox("Select Conversion Type:", ["Relative Wind to True Wind", "True Wind to Relative Wind", "Dataset: Relative Wind to True Wind", "Polar Map: Relative Wind for All Headings"], key="conversion_type")
+
+# Dataset mode works on a whole BOSS report table instead of the sliders
+if conversion_type == "Dataset: Relative Wind to True Wind":
+    import pandas as pd  # Only the dataset mode needs pandas
 
+    st.write("Upload a cleaned BOSS file (or any CSV/XLSX with the same columns), or load reports from the fleet store. True wind is calculated for every row at once.")
+    source = st.radio("Reports Source:", ("Upload file", "Fleet store"), horizontal=True, key="dataset_source")
+
+    df = None
+    if source == "Fleet store":
+        df = fleet_store_loader(key="wind_store")
+    else:
+        uploaded_file = st.file_uploader("Upload reports file", type=["csv", "xlsx"])
+        if uploaded_file:
+            if uploaded_file.name.lower().endswith(".csv"):
+                df = pd.read_csv(uploaded_file)
+            else:
+                df = pd.read_excel(uploaded_file)
+
+    if df is not None and not df.empty:
+        # Reports have no heading; the course between their consecutive positions stands in for it
+        if POSITION_COURSE_COLUMN not in df.columns and {"Lat", "Long"} <= set(df.columns):
+            df = add_position_course(df)
+            st.caption(f"{POSITION_COURSE_COLUMN} is the course from each report's previous position (blank for the first report of a voyage). "
+                       "Pick another heading column below if the file has one.")
+
+        # Map the file's columns onto the calculation inputs. Inputs whose usual column isn't
+        # in the file are left unset rather than guessed, so they have to be chosen by hand.
+        columns = {}
+        map_cols = st.columns(len(DATASET_COLUMNS))
+        for map_col, (key, default) in zip(map_cols, DATASET_COLUMNS.items()):
+            options = list(df.columns)
+            index = options.index(default) if default in options else None
+            with map_col:
+                columns[key] = st.selectbox(f"{default} column", options, index=index, placeholder="Choose a column", key=f"dataset_{key}")
+
+        unmapped = [DATASET_COLUMNS[key] for key, column in columns.items() if column is None]
+        if unmapped:
+            note = f" ({POSITION_COURSE_COLUMN} needs Lat and Long columns)" if columns["heading"] is None else ""
+            st.error(f"No column chosen for {', '.join(unmapped)}. Pick the matching column above{note}.")
+            st.stop()
+
+        unit_col1, unit_col2 = st.columns(2)
+        with unit_col1:
+            wind_speed_input = st.radio("Relative Wind Speed Column Unit:", ("Beaufort", "knots", "m/sec"), index=0, key="dataset_wind_speed_input")
+        with unit_col2:
+            wind_speed_output = st.radio("True Wind Speed Unit:", ("knots", "m/sec"), index=0, key="dataset_wind_speed_output")
+
+        try:
+            result = calculate_true_wind_dataset(df, columns, wind_speed_input, wind_speed_output)
+        except ValueError as e:
+            st.error(f"The chosen columns must be numeric: {e}")
+            st.stop()
+
+        st.write(f"Processed {len(result)} rows")
+        st.dataframe(result)
+        st.download_button(label="Download Results (CSV)", data=result.to_csv(index=False), file_name="true_wind_dataset.csv", mime="text/csv")
+    st.stop()
+
+# Polar map mode resolves every heading at once instead of sweeping the heading slider
+if conversion_type == "Polar Map: Relative Wind for All Headings":
+    with col1:
+        true_wind_dir = st.slider("True Wind Direction (0 to 360 deg)", 0, 360, step=5, key="map_true_wind_dir")
+        true_wind_speed = st.slider("True Wind Speed", 0, 60, 20, step=5, key="map_true_wind_speed")
+        wind_speed_unit = st.radio("Wind Speed Unit:", ("knots", "m/sec"), index=0, key="map_wind_speed_unit")
+        stw_grid = st.checkbox("Range of STW values", value=False, key="map_stw_grid")
+        if stw_grid:
+            stw_min, stw_max = st.slider("Ship's Speed (STW) range (kts)", 6, 30, (8, 16), step=1, key="map_stw_range")
+            stws = list(range(stw_min, stw_max + 1))
+        else:
+            stws = [st.slider("Ship's Speed (STW) (kts)", 6, 30, 12, step=1, key="map_stw")]
+        limit = st.slider("Acceptable Relative Wind Speed", 0, 80, 30, step=1, key="map_limit")
+
+    # Every heading (x every STW) in one array evaluation, converted back to the input unit
+    with recorder.stage("polar_map"):
+        factor = KNOTS_PER_MS if wind_speed_unit == "m/sec" else 1
+        rel_speed, rel_dir = relative_wind_polar(true_wind_speed * factor, true_wind_dir, stws)
+        rel_speed = rel_speed / factor
+
+    unit = "kts" if wind_speed_unit == "knots" else "m/sec"
+    with col1:
+        acceptable = heading_ranges(rel_speed[:, 0] <= limit)
+        ranges = ", ".join(f"{first}-{last} deg" if first != last else f"{first} deg" for first, last in acceptable) or "none"
+        st.write(f"**Headings with relative wind <= {limit} {unit} at {stws[0]} kts: {ranges}**")
+
+    with recorder.stage("render"), col2:
+        cached_figure(relative_wind_map_figure, POLAR_HEADINGS, tuple(stws), rel_speed, limit, true_wind_dir, unit)
+
+    import pandas as pd  # Only needed for the table download
+
+    table = pd.DataFrame({
+        "Heading": POLAR_HEADINGS.repeat(len(stws)),
+        "STW (kts)": stws * len(POLAR_HEADINGS),
+        f"Relative Wind Speed ({unit})": rel_speed.ravel().round(1),
+        "Relative Wind Dir": rel_dir.ravel().round(0),
+    })
+    st.download_button(label="Download Polar Map (CSV)", data=table.to_csv(index=False), file_name="relative_wind_polar_map.csv", mime="text/csv")
+
+    figure_cache_metric()
+    instrumentation_panel(recorder)
+    st.stop()
+
+with col1:
     # Inputs
     heading = st.slider("Heading (deg)", 0, 360, step=5, key="heading")
     stw = st.slider("Ship's Speed (STW) (kts)", 6, 30, step=1, key="stw")
@@ -115,31 +162,9 @@ with col1:
         plot_vectors = [(heading, stw, 'r', 'Ship Heading & STW')]
         true_wind_arrow = (true_wind_dir, wind_speed, true_wind_speed)
 
-# Plotting polar diagram
-fig, ax = plt.subplots(figsize=(5, 5), subplot_kw={'projection': 'polar'})  # Reduce the size by 30%
-ax.set_title(plot_title, pad=20)
-ax.set_theta_zero_location('N')
-ax.set_theta_direction(-1)
-
-# Plot concentric circles
-for r in range(0, int(wind_speed) + 5, 5):
-    ax.add_patch(Circle((0, 0), r, transform=ax.transData._b, color="grey", alpha=0.2, fill=False))
-
-# Plot vectors
-for angle, speed, color, label in plot_vectors:
-    angle_rad = np.radians(angle)
-    ax.plot([0, angle_rad], [0, speed], color=color, label=label)
-
-# Plot true wind as an arrow from the periphery towards the center
-true_wind_angle_rad = np.radians(true_wind_arrow[0])
-arrow_length = 5  # Fixed length for the arrow
-start_radius = wind_speed
-end_radius = start_radius - arrow_length
-ax.annotate('', xy=(true_wind_angle_rad, end_radius), xytext=(true_wind_angle_rad, start_radius),
-            arrowprops=dict(facecolor='blue', edgecolor='blue', arrowstyle='-|>', lw=2))
-ax.text(true_wind_angle_rad, start_radius + 1, f'{int(true_wind_arrow[2])} kts', color='blue', fontsize=10, fontweight='bold', ha='left', va='center')
-
-ax.legend(loc='lower center', bbox_to_anchor=(0.5, -0.25))
-
-with col2:
-    st.pyplot(fig)
+# Polar diagram, rendered once per rounded set of inputs (timed as the render stage)
+with recorder.stage("render"), col2:
+    cached_figure(wind_figure, plot_title, wind_speed, tuple(plot_vectors), true_wind_arrow)
+
+figure_cache_metric()
+instrumentation_panel(recorder)
@@ -1,10 +1,69 @@
 import numpy as np
 import pandas as pd
 import streamlit as st
-import matplotlib.pyplot as plt
+from eopd.fitting import fit_curve, evaluate_curve, curve_formula, fit_fleet_curves, evaluate_fleet_curves, cross_validate_curves, cross_validate_fleet, model_name, FLEET_SPEED_COLUMNS, FLEET_CONS_COLUMN
+from eopd.ui import instrumentation_recorder, instrumentation_panel, fleet_store_loader
 
 # Set wide layout for the Streamlit app
 st.set_page_config(layout="wide", page_icon="📈",)
+recorder = instrumentation_recorder("cons_extrapolator")
+
+# Fit once per data table, fit type and degree; shared by all sessions on the server
+@st.cache_data(max_entries=256, show_spinner=False)
+def cached_fit(speed, me_cons, fit_type, degree):
+    return fit_curve(speed, me_cons, fit_type, degree)
+
+# 5-fold cross-validation of every model on the data table
+@st.cache_data(max_entries=256, show_spinner=False)
+def cached_cross_validation(speed, me_cons):
+    return cross_validate_curves(speed, me_cons, k=5)
+
+# Fleet fits per vessel (and condition), cached on the report table and fit settings
+@st.cache_data(max_entries=16, show_spinner=False)
+def cached_fleet_fit(df, speed_column, fit_type, degree, group_columns, min_reports):
+    return fit_fleet_curves(df, speed_column, fit_type, degree, group_columns, min_reports=min_reports)
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def cached_fleet_cross_validation(df, speed_column, group_columns, min_reports):
+    return cross_validate_fleet(df, speed_column, group_columns, min_reports=min_reports, k=5)
+
+# Draw the observed data and fitted curve once per fit, then only move the input speed marker
+def speed_figure(speed, me_cons, fit_type, coeffs, input_speed, calculated_me_cons):
+    key = (fit_type, tuple(coeffs), tuple(speed), tuple(me_cons))
+    cached = st.session_state.get('cons_extrapolator_figure')
+    if cached is None or cached[0] != key:
+        from matplotlib.figure import Figure  # Loaded with the first plot, not at startup
+
+        # Figure rather than plt.subplots so replaced figures are freed, not kept by pyplot
+        fig = Figure()
+        ax = fig.subplots()
+        ax.scatter(speed, me_cons, color="blue", label="Observed Data")
+        ax.plot(speed, evaluate_curve(fit_type, coeffs, speed), color="red", label="Fitted Model")
+        marker = ax.scatter([], [], color="green", s=100, marker='x')
+        ax.set_xlabel("Speed (kn)")
+        ax.set_ylabel("ME Cons (MT/24Hr)")
+        cached = (key, fig, ax, marker)
+        st.session_state['cons_extrapolator_figure'] = cached
+
+    _, fig, ax, marker = cached
+    marker.set_offsets([[input_speed, calculated_me_cons]])
+    marker.set_label(f"Input Speed: {input_speed} kn")
+    ax.legend()
+    return fig
+
+# Moving the slider reruns only this fragment: the cached fit is evaluated at the new speed
+# and the marker redrawn, without refitting or rebuilding the rest of the page
+@st.fragment
+def input_speed_section(speed, me_cons, fit_type, coeffs):
+    input_speed = st.slider("Input Speed (knots):", min_value=8.0, max_value=15.0, value=11.5, step=0.1)
+    calculated_me_cons = evaluate_curve(fit_type, coeffs, input_speed)
+
+    # Display calculated ME Consumption for the input speed
+    st.write(f"### Calculated ME Cons for {input_speed} kn: {calculated_me_cons:.2f} MT/24Hr")
+
+    # Plot the data, fitted model and input speed
+    with recorder.stage("render"):
+        st.pyplot(speed_figure(speed, me_cons, fit_type, coeffs, input_speed, calculated_me_cons))
 
 # Initialize session state for data storage
 if 'speed_me_cons' not in st.session_state:
@@ -18,6 +77,87 @@ if 'fit_type' not in st.session_state:
 # Input data in tabular format
 st.write("## Consumption Extrapolator")
 
+# Fleet mode fits curves per vessel and condition from cleaned BOSS reports instead of the table
+mode = st.radio("Data Source:", ("Manual table", "Fleet BOSS data"), horizontal=True, key="extrapolator_mode")
+if mode == "Fleet BOSS data":
+    st.write("Upload a cleaned BOSS file (or any CSV/XLSX with the same columns), or load reports from the fleet store. A curve is fitted for every vessel and loading condition.")
+    source = st.radio("Reports Source:", ("Upload file", "Fleet store"), horizontal=True, key="fleet_source")
+
+    df = None
+    if source == "Fleet store":
+        df = fleet_store_loader(key="extrapolator_store")
+    else:
+        uploaded_file = st.file_uploader("Upload reports file", type=["csv", "xlsx"])
+        if uploaded_file:
+            if uploaded_file.name.lower().endswith(".csv"):
+                df = pd.read_csv(uploaded_file)
+            else:
+                df = pd.read_excel(uploaded_file)
+
+    if df is not None and not df.empty:
+        speed_options = [column for column in FLEET_SPEED_COLUMNS if column in df.columns]
+        if "Vessel Name" not in df.columns or FLEET_CONS_COLUMN not in df.columns or not speed_options:
+            st.error(f"The reports need Vessel Name, {FLEET_CONS_COLUMN} and one of {', '.join(FLEET_SPEED_COLUMNS)} columns.")
+            st.stop()
+
+        fleet_col1, fleet_col2, fleet_col3, fleet_col4 = st.columns(4)
+        with fleet_col1:
+            speed_column = st.selectbox("Speed Column:", speed_options, key="fleet_speed_column")
+        with fleet_col2:
+            fleet_fit_type = st.selectbox("Select Fit Type:", ["Exponential", "Polynomial"], key="fleet_fit_type")
+        with fleet_col3:
+            fleet_degree = st.slider("Select Degree of Polynomial:", 1, 5, 2, key="fleet_degree", disabled=fleet_fit_type != "Polynomial")
+        with fleet_col4:
+            min_reports = st.number_input("Minimum Reports per Curve:", min_value=2, value=10, step=1, key="fleet_min_reports")
+        by_condition = st.checkbox("Separate curves per Condition", value="Condition" in df.columns, disabled="Condition" not in df.columns, key="fleet_by_condition")
+        group_columns = ("Vessel Name", "Condition") if by_condition else ("Vessel Name",)
+
+        with recorder.stage("fit"):
+            fits = cached_fleet_fit(df, speed_column, fleet_fit_type, fleet_degree if fleet_fit_type == "Polynomial" else None, group_columns, min_reports)
+        if fits.empty:
+            st.warning(f"No vessel has at least {min_reports} reports with {speed_column} and {FLEET_CONS_COLUMN} above zero.")
+            st.stop()
+
+        # ME Cons over the same 8 to 15 kn range as the manual table, for every curve at once
+        speed_range = np.arange(8, 15.5, 0.5)
+        curves = evaluate_fleet_curves(fits, fleet_fit_type, speed_range, group_columns).round(1)
+
+        st.write(f"Fitted {len(fits)} curves from {fits['Reports'].sum()} reports")
+        st.dataframe(fits.drop(columns="Coefficients"), hide_index=True)
+        st.write("### ME Consumption (MT/24Hr) by Speed (kn)")
+        st.dataframe(curves)
+        st.download_button(label="Download Curves (CSV)", data=curves.reset_index().to_csv(index=False), file_name="fleet_speed_cons_curves.csv", mime="text/csv")
+
+        # Which model generalizes best for each vessel, by 5-fold cross-validation
+        if st.checkbox("Cross-validate all models per vessel", key="fleet_cross_validate"):
+            with recorder.stage("cross_validate"):
+                fleet_cv = cached_fleet_cross_validation(df, speed_column, group_columns, min_reports)
+            st.write("### Best Model per Vessel (5-fold CV RMSE, MT/24Hr)")
+            st.dataframe(fleet_cv, hide_index=True)
+            st.download_button(label="Download Model Selection (CSV)", data=fleet_cv.to_csv(index=False), file_name="fleet_model_selection.csv", mime="text/csv")
+
+        # Reports and fitted curves of one vessel
+        vessel = st.selectbox("Plot Vessel:", fits["Vessel Name"].unique(), key="fleet_plot_vessel")
+        with recorder.stage("render"):
+            from matplotlib.figure import Figure
+
+            fig = Figure()
+            ax = fig.subplots()
+            vessel_fits = fits[fits["Vessel Name"] == vessel]
+            vessel_reports = df[df["Vessel Name"] == vessel]
+            for _, fit in vessel_fits.iterrows():
+                reports = vessel_reports[vessel_reports["Condition"] == fit["Condition"]] if by_condition else vessel_reports
+                label = fit["Condition"] if by_condition else vessel
+                points = ax.scatter(reports[speed_column], reports[FLEET_CONS_COLUMN], s=10, alpha=0.5, label=f"{label} reports")
+                ax.plot(speed_range, evaluate_curve(fleet_fit_type, fit["Coefficients"], speed_range), color=points.get_facecolor()[0][:3], label=f"{label} fit")
+            ax.set_xlabel(f"{speed_column} (kn)")
+            ax.set_ylabel("ME Cons (MT/24Hr)")
+            ax.legend()
+            st.pyplot(fig)
+
+    instrumentation_panel(recorder)
+    st.stop()
+
 # Data editor for entering speed and ME consumption values
 st.write("### Enter Speed and ME Cons Data")
 data_df = st.data_editor(st.session_state['speed_me_cons'], num_rows="dynamic")
@@ -30,55 +170,48 @@ if st.button("Submit Data"):
 speed = st.session_state['speed_me_cons']["Speed (kn)"].values
 me_cons = st.session_state['speed_me_cons']["ME Cons (MT/24Hr)"].values
 
-# Side-by-side layout for input speed slider and fit type dropdown
+# Side-by-side layout for fit type dropdown and polynomial degree
 col1, col2 = st.columns(2)
 with col1:
-    input_speed = st.slider("Input Speed (knots):", min_value=8.0, max_value=15.0, value=11.5, step=0.1)
-with col2:
-    fit_type = st.selectbox("Select Fit Type:", ["Exponential", "Polynomial"])
+    fit_type = st.selectbox("Select Fit Type:", ["Exponential", "Polynomial", "Automatic (cross-validated)"])
 
 # If polynomial fit is selected, show degree selection slider
+degree = None
 if fit_type == "Polynomial":
-    degree = st.slider("Select Degree of Polynomial:", 1, 5, 2)
-
-# Calculate ME Consumption based on selected fit type
-if fit_type == "Exponential":
-    b = np.polyfit(speed, np.log(me_cons), 1)[0]
-    a = np.exp(np.polyfit(speed, np.log(me_cons), 1)[1])
-    calculated_me_cons = a * np.exp(b * input_speed)
-    fitted_me_cons = a * np.exp(b * speed)
-    formula = f"ME Cons = {a:.4f} * exp({b:.4f} * Speed)"
-else:
-    coeffs = np.polyfit(speed, me_cons, degree)
-    poly_model = np.poly1d(coeffs)
-    calculated_me_cons = poly_model(input_speed)
-    fitted_me_cons = poly_model(speed)
-    formula = f"ME Cons = {' + '.join([f'{c:.4f}*Speed^{i}' for i, c in enumerate(coeffs[::-1])])}"
-
-# Display calculated ME Consumption for the input speed
-st.write(f"### Calculated ME Cons for {input_speed} kn: {calculated_me_cons:.2f} MT/24Hr")
-st.write(f"Fitted Model: {formula}")
+    with col2:
+        degree = st.slider("Select Degree of Polynomial:", 1, 5, 2)
+
+# Automatic mode picks the model with the lowest 5-fold cross-validated error
+if fit_type == "Automatic (cross-validated)":
+    with recorder.stage("cross_validate"):
+        cv_results = cached_cross_validation(speed, me_cons)
+    best = cv_results.iloc[0]
+    if pd.isna(best["CV RMSE"]):
+        st.warning("Too few data points to cross-validate; using the exponential fit.")
+        fit_type = "Exponential"
+    else:
+        fit_type = best["Fit Type"]
+        degree = None if pd.isna(best["Degree"]) else int(best["Degree"])
+        with col2:
+            st.write(f"Selected Model: **{model_name(fit_type, degree)}** (CV RMSE {best['CV RMSE']:.2f} MT/24Hr)")
+            with st.expander("Cross-validation Results"):
+                st.dataframe(cv_results.drop(columns=["Fit Type", "Degree"]).round(3), hide_index=True)
+
+# Fit ME Consumption with the selected fit type (cached)
+with recorder.stage("fit"):
+    coeffs = cached_fit(speed, me_cons, fit_type, degree)
+st.write(f"Fitted Model: {curve_formula(fit_type, coeffs)}")
 
 # Create side-by-side columns for plot and table
 col3, col4 = st.columns(2)
 
-# Plot the data and fitted model in the first column
+# Input speed slider, calculated ME Cons and plot in the first column
 with col3:
-    fig, ax = plt.subplots()
-    ax.scatter(speed, me_cons, color="blue", label="Observed Data")
-    ax.plot(speed, fitted_me_cons, color="red", label="Fitted Model")
-    ax.scatter(input_speed, calculated_me_cons, color="green", label=f"Input Speed: {input_speed} kn", s=100, marker='x')
-    ax.set_xlabel("Speed (kn)")
-    ax.set_ylabel("ME Cons (MT/24Hr)")
-    ax.legend()
-    st.pyplot(fig)
+    input_speed_section(speed, me_cons, fit_type, coeffs)
 
 # Output table for ME Cons over a speed range (8 to 15 in 0.5 steps) in the second column
 speed_range = np.arange(8, 15.5, 0.5)
-if fit_type == "Exponential":
-    me_cons_range = a * np.exp(b * speed_range)
-else:
-    me_cons_range = poly_model(speed_range)
+me_cons_range = evaluate_curve(fit_type, coeffs, speed_range)
 
 # Format table values to one decimal place and remove index
 output_df = pd.DataFrame({"Speed (kn)": np.round(speed_range, 1), "ME Cons (MT/24Hr)": np.round(me_cons_range, 1)})
@@ -87,3 +220,5 @@ output_df = pd.DataFrame({"Speed (kn)": np.round(speed_range, 1), "ME Cons (MT/2
 with col4:
     st.write("### ME Consumption Table for Speed Range 8-15 kn")
     st.table(output_df)
+
+instrumentation_panel(recorder)
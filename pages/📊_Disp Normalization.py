@@ -1,11 +1,76 @@
 import streamlit as st
-import numpy as np
+from eopd.displacement import normalize_consumption, fit_admiralty_exponent, normalize_dataset, DATASET_COLUMNS
+from eopd.ui import fleet_store_loader
 
 st.set_page_config(page_icon="📊",)
 
+# Per-vessel Admiralty exponents, cached on the report table and fit settings
+@st.cache_data(max_entries=16, show_spinner=False)
+def cached_admiralty_fit(df, columns, min_reports):
+    return fit_admiralty_exponent(df, dict(columns), min_reports)
+
+# Normalize the ME Cons/day of every report in a cleaned BOSS table to one reference displacement
+def dataset_mode():
+    import pandas as pd
+
+    st.write("Upload a cleaned BOSS file (or any CSV/XLSX with the same columns), or load reports from the fleet store. "
+             "ME Cons/day of every report is scaled from its Disp to the reference displacement.")
+    source = st.radio("Reports Source:", ("Upload file", "Fleet store"), horizontal=True, key="disp_source")
+
+    df = None
+    if source == "Fleet store":
+        df = fleet_store_loader(key="disp_store")
+    else:
+        uploaded_file = st.file_uploader("Upload reports file", type=["csv", "xlsx"])
+        if uploaded_file:
+            if uploaded_file.name.lower().endswith(".csv"):
+                df = pd.read_csv(uploaded_file)
+            else:
+                df = pd.read_excel(uploaded_file)
+    if df is None or df.empty:
+        return
+
+    required = [DATASET_COLUMNS["me_cons"], DATASET_COLUMNS["disp"]]
+    if not all(column in df.columns for column in required):
+        st.error(f"The reports need {' and '.join(required)} columns.")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        reference_displacement = st.number_input("**Reference Displacement (mts)**", min_value=10000, max_value=300000, value=60000, step=1, key="disp_reference")
+    with col2:
+        n = st.slider("**Admiralty Coefficient (n)**", min_value=0.20, max_value=0.99, value=0.66, step=0.01, key="disp_dataset_n")
+
+    # n fitted per vessel from log(ME Cons) vs log(Disp) (and log speed), falling back to the slider value
+    exponent = n
+    can_fit = DATASET_COLUMNS["vessel"] in df.columns
+    if st.checkbox("Fit n per vessel from the reports", value=can_fit, disabled=not can_fit, key="disp_fit_n"):
+        columns = dict(DATASET_COLUMNS)
+        if columns["speed"] not in df.columns:
+            columns["speed"] = None
+        min_reports = st.number_input("Minimum Reports per Vessel:", min_value=4, value=10, step=1, key="disp_min_reports")
+        fits = cached_admiralty_fit(df, tuple(columns.items()), min_reports)
+        if fits.empty:
+            st.warning(f"No report has a positive {columns['disp']} and {columns['me_cons']}, so n can't be fitted; using n = {n:.2f}.")
+        else:
+            st.write("### Fitted Admiralty Exponent per Vessel")
+            st.dataframe(fits.round(3), hide_index=True)
+            if fits["n"].isna().any():
+                st.info(f"Vessels without a fit (too few reports or too little spread in Disp) use n = {n:.2f}.")
+            exponent = fits.set_index(columns["vessel"])["n"]
+
+    result = normalize_dataset(df, reference_displacement, exponent, default_n=n)
+    st.write(f"### Reports Normalized to {reference_displacement} mts")
+    st.dataframe(result, hide_index=True)
+    st.download_button(label="Download Normalized Reports (CSV)", data=result.to_csv(index=False), file_name="normalized_reports.csv", mime="text/csv")
+
 def main():
     st.title("Displacement Normalization Calculator")
 
+    if st.radio("Mode:", ("Single value", "Dataset"), horizontal=True, key="disp_mode") == "Dataset":
+        dataset_mode()
+        return
+
     st.markdown(
         """
         <style>
@@ -93,7 +158,7 @@ def main():
         st.markdown('</div>', unsafe_allow_html=True)
 
     # Calculations
-    new_me_cons = me_cons * (new_displacement / current_displacement) ** n
+    new_me_cons = normalize_consumption(me_cons, current_displacement, new_displacement, n)
     percent_change = ((new_me_cons - me_cons) / me_cons) * 100
 
     # Outputs
@@ -2,14 +2,37 @@
 # streamlit run boss_cleanup.py
 
 import streamlit as st
-import pandas as pd
 from datetime import datetime
-from openpyxl import Workbook
-from openpyxl.utils.dataframe import dataframe_to_rows
-import io
+from eopd.cache import LRUCache
+from eopd.ui import instrumentation_recorder, instrumentation_panel
+from eopd.workers import configured_workers
 
 st.set_page_config(page_icon="📋",)
 
+# Parsed uploads (before the steaming-hours filter) keyed on file content, shared across reruns
+PARSE_CACHE_MAX_MB = 512
+
+@st.cache_resource
+def get_parse_cache():
+    return LRUCache(max_bytes=PARSE_CACHE_MAX_MB * 2**20)
+
+parse_cache = get_parse_cache()
+
+# Finished jobs' outputs kept for downloads across all sessions
+JOB_RESULTS_MAX_MB = 512
+
+# Uploads are processed in the background on a worker pool shared by all sessions, so the
+# page stays responsive and finished files survive reruns; sessions keep their job ids.
+# The number of worker processes is set once for the app ($EOPD_WORKERS, default CPU count).
+@st.cache_resource
+def get_job_queue():
+    from eopd.jobs import JobQueue
+
+    return JobQueue(max_workers=configured_workers(), cache=get_parse_cache(), max_bytes=JOB_RESULTS_MAX_MB * 2**20)
+
+job_queue = get_job_queue()
+recorder = instrumentation_recorder("boss")
+
 # Streamlit app title
 st.title("BOSS Raw Data Processor")
 
@@ -19,105 +42,100 @@ uploaded_files = st.file_uploader("Upload BOSS raw data files", accept_multiple_
 # Minimum steaming hours input
 min_steaming_hrs = st.number_input("Minimum Steaming Hrs", min_value=0, value=22)
 
-# Processing each uploaded file
+# Optionally keep the cleaned reports in the local Parquet fleet store for other pages
+append_to_store = st.checkbox("Append cleaned reports to fleet store", value=False)
+
+# Optionally flag reports whose DMG disagrees with the distance between consecutive Lat/Long positions
+dmg_tolerance_pct = None
+if st.checkbox("Cross-check DMG against positions", value=False, key="boss_dmg_check"):
+    dmg_tolerance_pct = st.number_input("DMG tolerance (%)", min_value=1.0, max_value=100.0, value=10.0, step=1.0, key="boss_dmg_tolerance",
+                                        help="Reports are flagged in the DMG Mismatch column when the position-derived distance differs from the DMG reported in the export (DMG (Rep)) by more than this (at least 5 NM)")
+
+# Data-quality rules on top of the steaming-hours filter (eopd.quality), edited as a table.
+# pandas only loads once the rules are switched on.
+rules = []
+if st.toggle("Data-quality rules", key="boss_use_rules"):
+    from eopd.quality import DEFAULT_RULES, RULE_KINDS, rules_from_table, rules_table
+
+    if "boss_rules" not in st.session_state:
+        st.session_state["boss_rules"] = rules_table(DEFAULT_RULES)
+    rules_editor = st.data_editor(
+        st.session_state["boss_rules"], num_rows="dynamic", hide_index=True, key="boss_rules_editor",
+        column_config={"Kind": st.column_config.SelectboxColumn("Kind", options=list(RULE_KINDS))},
+    )
+    st.caption("Reports failing any enabled rule are left out of the cleaned file. Range rules keep Min <= Column <= Max; "
+               "divergence rules keep |Column - Other Column| <= Max; allowed rules keep the comma-separated Allowed Values.")
+    rules = rules_from_table(rules_editor)
+
+if "boss_jobs" not in st.session_state:
+    st.session_state["boss_jobs"] = []
+    st.session_state["boss_reported_jobs"] = set()
+
+# Submit a job for each new set of uploads / settings; reruns with the same ones don't resubmit
 if uploaded_files:
-    for uploaded_file in uploaded_files:
-        # Load the Excel file and skip the first 4 rows
-        df = pd.read_excel(uploaded_file, skiprows=4)
-
-        # Step 1: Paste values and rename columns as specified
-        rename_columns = {
-            25: "DMG",
-            54: "Total Cons/day",
-            55: "ME Cons/day",
-            56: "AE Cons/day",
-            57: "Blr Cons/day",
-            58: "ME - MT/NM"
-        }
-        for col, new_name in rename_columns.items():
-            df.iloc[:, col] = df.iloc[:, col].values  # Paste values
-            df.rename(columns={df.columns[col]: new_name}, inplace=True)
-
-        # Rename additional specified columns
-        rename_cols = {
-            0: "S.No", 1: "Vessel Name", 2: "Voyage No", 3: "From", 4: "To", 
-            5: "Date/Time", 8: "Condition", 9: "Lat", 10: "Long", 12: "Report Type", 
-            23: "Steaming Hrs", 24: "SOG", 26: "BF (Rep)", 27: "Wind Dir (R) (Rep)", 
-            28: "Sea State (R)", 183: "Disp", 185: "Cargo wt", 186: "Ballast",
-            188: "Draft F", 189: "Draft A", 191: "ME Load", 192: "RPM", 193: "Slip%", 
-            194: "DTW", 196: "STW (HC)", 204: "STW (Rep)", 205: "CSS", 206: "BF (HC)",
-            207: "Wind Dir (R) (HC)", 208: "Sig wave ht (HC)", 209: "Sig wave Dir (HC)",
-            210: "CF (HC)", 211: "AE 1 hrs", 212: "AE 2 Hrs", 213: "AE 3 hrs", 
-            215: "Sig wave ht (Rep)", 216: "Scav Air Press"
-        }
-        df.rename(columns={df.columns[k]: v for k, v in rename_cols.items()}, inplace=True)
-
-        # Step 2: Create calculated columns
-        df["Avg Draft"] = (df.iloc[:, 188] + df.iloc[:, 189]) / 2  # Average Draft (Col 190)
-        df["DMG"] = df["Steaming Hrs"] * df["SOG"]  # DMG as Steaming Hrs * SOG
-        df["Total Cons/day"] = df["ME Cons/day"] + df["AE Cons/day"] + df["Blr Cons/day"]  # Total Cons/day as sum
-
-        # Step 3: Drop specified columns
-        delete_cols = [6, 7, 11, 13, 14, 15, 16, 17, 18, 19, 20, 21, 22, 29, 30, 31, 
-                       32, 33, 34, 35, 36, 37, 38, 39, 40, 41, 42, 43, 44, 45, 46, 47, 
-                       48, 49, 50, 51, 52, 53, 59, 60, 61, 62, 63, 64, 65, 66, 67, 68, 
-                       69, 70, 71, 72, 73, 74, 75, 76, 77, 78, 79, 80, 81, 82, 83, 84, 
-                       85, 86, 87, 88, 89, 90, 91, 92, 93, 94, 95, 96, 97, 98, 99, 100, 
-                       101, 102, 103, 104, 105, 106, 107, 108, 109, 110, 111, 112, 113, 
-                       114, 115, 116, 117, 118, 119, 120, 121, 122, 123, 124, 125, 126, 
-                       127, 128, 129, 130, 131, 132, 133, 134, 135, 136, 137, 138, 139, 
-                       140, 141, 142, 143, 144, 145, 146, 147, 148, 149, 150, 151, 152, 
-                       153, 154, 155, 156, 157, 158, 159, 160, 161, 162, 163, 164, 165, 
-                       166, 167, 168, 169, 170, 171, 172, 173, 174, 175, 176, 177, 178, 
-                       179, 180, 181, 182, 184, 187, 195, 197, 198, 199, 200, 201, 202, 203]
-        df.drop(df.columns[delete_cols], axis=1, inplace=True)
-
-        # Step 4: Filter based on Steaming Hrs
-        df = df[df['Steaming Hrs'] >= min_steaming_hrs]
-
-        # Step 5: Reorder columns as specified
-        new_column_order = [
-            "S.No", "Vessel Name", "Voyage No", "From", "To", "Date/Time", "Condition", "Lat", "Long", 
-            "Report Type", "Steaming Hrs", "DMG", "DTW", "SOG", "STW (HC)", "STW (Rep)", "CSS", "CF (HC)", 
-            "Total Cons/day", "ME Cons/day", "AE Cons/day", "Blr Cons/day", "ME - MT/NM", "Disp", 
-            "Cargo wt", "Ballast", "Draft F", "Draft A", "Avg Draft", "BF (Rep)", "BF (HC)", 
-            "Wind Dir (R) (Rep)", "Wind Dir (R) (HC)", "Sea State (R)", "Sig wave ht (Rep)", "Sig wave ht (HC)", 
-            "Sig wave Dir (HC)", "ME Load", "RPM", "Slip%", "AE 1 hrs", "AE 2 Hrs", "AE 3 hrs", "Scav Air Press"
-        ]
-        df_reordered = df[new_column_order]
-
-        # Step 6: Limit decimal places to 2 for all numeric columns
-        df_reordered = df_reordered.round(2)
-
-        # Step 7: Export to Excel with auto-fit column widths
-        wb = Workbook()
-        ws = wb.active
-
-        # Add headers and data to the worksheet
-        for r_idx, row in enumerate(dataframe_to_rows(df_reordered, index=False, header=True)):
-            ws.append(row)
-
-        # Auto-fit column widths
-        for col in ws.columns:
-            max_length = 0
-            col_letter = col[0].column_letter  # Get the column name
-            for cell in col:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = (max_length + 2) * 1.2  # Add a little extra space
-            ws.column_dimensions[col_letter].width = adjusted_width
-
-        # Save the file to a BytesIO stream to enable download
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
-        
-        # Generate a unique filename
-        vessel_name = df_reordered["Vessel Name"].iloc[0] if "Vessel Name" in df_reordered else "Unknown_Vessel"
-        filename = f"BOSS_raw_data_{vessel_name}_{datetime.now().strftime('%d%m%y%H%M')}.xlsx"
-
-        # Provide download link
-        st.download_button(label=f"Download Processed File: {filename}", data=output, file_name=filename, mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    submission = (tuple(uploaded_file.file_id for uploaded_file in uploaded_files), min_steaming_hrs, append_to_store, repr(rules), dmg_tolerance_pct)
+    if st.session_state.get("boss_submission") != submission:
+        with recorder.stage("submit"):
+            job_id = job_queue.submit([uploaded_file.name for uploaded_file in uploaded_files], [uploaded_file.getvalue() for uploaded_file in uploaded_files],
+                                      min_steaming_hrs, append_to_store, instrument=recorder.enabled, rules=rules, dmg_tolerance_pct=dmg_tolerance_pct)
+        st.session_state["boss_submission"] = submission
+        st.session_state["boss_jobs"].append(job_id)
+
+# Progress and downloads of one job, newest job first
+def job_status(job):
+    with st.container(border=True):
+        started = datetime.fromtimestamp(job.submitted_at).strftime('%H:%M:%S')
+        st.progress(job.done / len(job.names), text=f"Job {job.id} ({started}): {job.done}/{len(job.names)} files processed")
+
+        # Provide download links in upload order, as each file finishes
+        for i, (name, result, error) in enumerate(zip(job.names, job.results, job.errors)):
+            if error is not None:
+                st.error(f"{name}: {error}")
+            elif result is not None:
+                vessel_name, output, _, _ = result
+                # Generate a unique filename
+                filename = f"BOSS_raw_data_{vessel_name}_{datetime.fromtimestamp(job.submitted_at).strftime('%d%m%y%H%M')}.xlsx"
+                st.download_button(label=f"Download Processed File: {filename}", data=output, file_name=filename,
+                                   mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", key=f"boss_download_{job.id}_{i}", on_click="ignore")
+
+        if job.finished:
+            if job.append_to_store:
+                st.success(f"Appended {job.stored} reports to the fleet store")
+            if job.dmg_tolerance_pct is not None:
+                flagged = sum(int(result[2]["DMG Mismatch"].sum()) for result in job.results if result is not None)
+                st.write(f"{flagged} reports flagged with DMG Mismatch (reported DMG more than {job.dmg_tolerance_pct:g}% off the position-derived distance)")
+            rejections = job.rejections()
+            if rejections is not None:
+                with st.expander(f"Reports rejected by rule ({rejections['Reports'].iloc[0]} reports)"):
+                    st.dataframe(rejections.drop(columns="Reports"), hide_index=True)
+            # Cleaned tables are kept with compact dtypes (eopd.boss.compact_boss_dataframe)
+            st.caption(f"Cleaned reports in memory: {job.memory_before / 2**20:.1f} MB, {job.memory_after / 2**20:.1f} MB with compact dtypes")
+
+# Polls every second while a job runs, rerunning only this fragment; the whole page reruns once they're all done
+def job_panel(was_running):
+    jobs = [job for job in map(job_queue.get, st.session_state["boss_jobs"]) if job is not None]
+    for job in reversed(jobs):
+        job_status(job)
+    if was_running and all(job.finished for job in jobs):
+        st.rerun()
+
+jobs = [job for job in map(job_queue.get, st.session_state["boss_jobs"]) if job is not None]
+running = any(not job.finished for job in jobs)
+st.fragment(job_panel, run_every=1.0 if running else None)(running)
+
+if jobs and not running and st.button("Clear finished jobs"):
+    job_queue.remove(st.session_state["boss_jobs"])
+    st.session_state["boss_jobs"] = []
+    st.rerun()
+
+# Worker stage timings of each finished job, added to the panel once
+for job in jobs:
+    if job.finished and job.id not in st.session_state["boss_reported_jobs"]:
+        recorder.extend(job.records, job=job.id)
+        st.session_state["boss_reported_jobs"].add(job.id)
+
+# Parse cache usage, shown after processing so it includes this run's files
+st.sidebar.caption(f"Parse cache: {len(parse_cache)} files, {parse_cache.total_bytes / 2**20:.0f} / {PARSE_CACHE_MAX_MB} MB")
+
+# Per-stage timings when instrumentation is switched on
+instrumentation_panel(recorder)
@@ -0,0 +1,78 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from openpyxl import load_workbook
+
+from benchmarks.generate_boss import N_COLUMNS, boss_workbook
+from eopd.boss import BOSS_COLUMNS, BOSS_HEADERS, BOSS_OUTPUT_COLUMNS, parse_boss_file, process_boss_file, read_boss_excel, resolve_boss_columns, screen_boss_dataframe
+
+@pytest.fixture(scope="module")
+def workbook(tmp_path_factory):
+    with open(boss_workbook(30, tmp_path_factory.mktemp("boss")), "rb") as f:
+        return f.read()
+
+# The transform as the page first did it: read the whole sheet, rename by position,
+# recalculate, filter, reorder and round
+def baseline_transform(data, min_steaming_hrs):
+    df = pd.read_excel(io.BytesIO(data), skiprows=4)
+    df = df.rename(columns={df.columns[position]: name for position, name in BOSS_COLUMNS.items()})
+    df["Avg Draft"] = (df["Draft F"] + df["Draft A"]) / 2
+    df["DMG"] = df["Steaming Hrs"] * df["SOG"]
+    df["Total Cons/day"] = df["ME Cons/day"] + df["AE Cons/day"] + df["Blr Cons/day"]
+    df = df[df["Steaming Hrs"] >= min_steaming_hrs]
+    return df[BOSS_OUTPUT_COLUMNS].round(2)
+
+@pytest.mark.filterwarnings("ignore")  # The baseline's own fragmentation / rounding warnings
+@pytest.mark.parametrize("min_steaming_hrs", [0, 22])
+def test_matches_baseline_transform(workbook, min_steaming_hrs):
+    expected = baseline_transform(workbook, min_steaming_hrs)
+    vessel_name, output, cleaned, *_ = process_boss_file(workbook, min_steaming_hrs)
+    assert vessel_name == expected["Vessel Name"].iloc[0]
+
+    # pd.read_excel turns numeric-looking text ("00001") into numbers; the reader keeps it as written
+    assert cleaned["Voyage No"].str.startswith("0").all()
+    cleaned = cleaned.assign(**{"Voyage No": pd.to_numeric(cleaned["Voyage No"])})
+    pd.testing.assert_frame_equal(cleaned, expected, check_dtype=False)
+    pd.testing.assert_frame_equal(pd.read_excel(io.BytesIO(output)), expected.reset_index(drop=True), check_dtype=False)
+
+def test_header_checked_by_position():
+    header = [BOSS_HEADERS.get(i, f"Field {i}") for i in range(N_COLUMNS)]
+    assert resolve_boss_columns(header) == list(BOSS_COLUMNS)
+    assert resolve_boss_columns([f"  {text.upper()} " for text in header]) == list(BOSS_COLUMNS)  # Case and spacing aside
+
+    header[23], header[24] = header[24], header[23]
+    with pytest.raises(ValueError, match="column 24 is 'SOG', expected 'Steaming Hrs'.*column 25 is 'Steaming Hrs', expected 'SOG'"):
+        resolve_boss_columns(header)
+
+def test_reordered_export_is_refused(workbook):
+    # Same width, Steaming Hrs and SOG swapped (header and values)
+    wb = load_workbook(io.BytesIO(workbook))
+    sheet = wb.worksheets[0]
+    for steaming, sog in zip(sheet["X"], sheet["Y"]):
+        steaming.value, sog.value = sog.value, steaming.value
+    swapped = io.BytesIO()
+    wb.save(swapped)
+    with pytest.raises(ValueError, match="BOSS layout changed"):
+        read_boss_excel(swapped.getvalue())
+
+def test_dmg_check_uses_reported_dmg(workbook):
+    parsed = parse_boss_file(workbook)
+    assert "DMG (Rep)" in parsed
+
+    # Heading due north 120 NM (2 deg) a report; the recalculated DMG (24 NM) disagrees everywhere
+    df = parsed.copy()
+    df["Lat"] = [f"{2 * i:02d} 00.0 N" for i in range(len(df))]
+    df["Long"] = "000 00.0 E"
+    df["Steaming Hrs"] = 24.0
+    df["SOG"] = 1.0
+    df["DMG"] = 24.0
+    df["DMG (Rep)"] = 120.0
+    df.loc[10, "DMG (Rep)"] = 200.0
+
+    cleaned, _ = screen_boss_dataframe(df, 0, dmg_tolerance_pct=10)
+    assert list(cleaned.columns[-3:]) == ["DMG (Rep)", "Position Dist (NM)", "DMG Mismatch"]
+    assert np.flatnonzero(cleaned["DMG Mismatch"]).tolist() == [10]
+    np.testing.assert_allclose(cleaned["Position Dist (NM)"].iloc[1:], 120.0, atol=0.1)
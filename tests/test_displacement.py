@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from eopd.displacement import fit_admiralty_exponent, normalize_dataset
+
+rng = np.random.default_rng(2)
+DISP = rng.uniform(40000, 100000, 60)
+SOG = rng.uniform(10, 14, 60)
+REPORTS = pd.DataFrame({
+    "Vessel Name": np.repeat(["A", "B"], 30),
+    "Disp": DISP,
+    "SOG": SOG,
+    "ME Cons/day": 0.02 * DISP ** 0.66 * SOG ** 3 / 100,
+})
+
+def test_fit_recovers_exponents():
+    fits = fit_admiralty_exponent(REPORTS)
+    np.testing.assert_allclose(fits["n"], 0.66)
+    np.testing.assert_allclose(fits["Speed Exponent"], 3)
+
+@pytest.mark.parametrize("change", [{"Disp": np.nan}, {"ME Cons/day": 0.0}])
+def test_fit_without_usable_reports_is_empty(change):
+    fits = fit_admiralty_exponent(REPORTS.assign(**change))
+    assert fits.empty and "n" in fits
+    result = normalize_dataset(REPORTS, 60000, fits.set_index("Vessel Name")["n"], default_n=0.5)
+    assert (result["Admiralty n"] == 0.5).all()
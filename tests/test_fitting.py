@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from eopd.fitting import CV_MODELS, CurveAccumulator, _cv_rmse
+
+rng = np.random.default_rng(1)
+SPEED = rng.uniform(8, 16, 400)
+ME_CONS = 0.9 * np.exp(0.27 * SPEED) * rng.normal(1, 0.05, 400)
+
+# Coefficients like fit_curve's, straight from np.polyfit
+def polyfit_curve(speed, me_cons, fit_type, degree):
+    if fit_type == "Exponential":
+        b, log_a = np.polyfit(speed, np.log(me_cons), 1)
+        return np.array([np.exp(log_a), b])
+    return np.polyfit(speed, me_cons, degree)
+
+@pytest.mark.parametrize("fit_type, degree", CV_MODELS)
+def test_accumulator_matches_polyfit(fit_type, degree):
+    accumulator = CurveAccumulator(fit_type, degree or 2)
+    for chunk in np.array_split(np.arange(len(SPEED)), 7):
+        accumulator.add(SPEED[chunk], ME_CONS[chunk])
+    expected = polyfit_curve(SPEED, ME_CONS, fit_type, degree)
+    np.testing.assert_allclose(accumulator.coefficients(), expected, rtol=1e-8, atol=1e-10)
+
+def test_cv_rmse_matches_polyfit_per_fold():
+    k, seed = 5, 3
+    folds = np.empty(len(SPEED), dtype=int)
+    folds[np.random.default_rng(seed).permutation(len(SPEED))] = np.arange(len(SPEED)) % k
+
+    expected = []
+    for fit_type, degree in CV_MODELS:
+        predictions = np.empty(len(SPEED))
+        for fold in range(k):
+            train, test = folds != fold, folds == fold
+            coeffs = polyfit_curve(SPEED[train], ME_CONS[train], fit_type, degree)
+            if fit_type == "Exponential":
+                predictions[test] = coeffs[0] * np.exp(coeffs[1] * SPEED[test])
+            else:
+                predictions[test] = np.polyval(coeffs, SPEED[test])
+        expected.append(np.sqrt(np.mean((ME_CONS - predictions) ** 2)))
+    np.testing.assert_allclose(_cv_rmse(SPEED, ME_CONS, k, seed), expected, rtol=1e-9)
@@ -0,0 +1,21 @@
+import tracemalloc
+
+from eopd.instrument import StageRecorder
+
+def test_no_memory_traced_outside_worker_processes():
+    recorder = StageRecorder("test")
+    with recorder.stage("work"):
+        bytearray(2**20)
+    assert recorder.records[0]["peak_mb"] is None and not tracemalloc.is_tracing()
+
+def test_nested_stage_leaves_outer_measurement_alone():
+    recorder = StageRecorder("test", trace_memory=True)
+    with recorder.stage("outer"):
+        block = bytearray(4 * 2**20)
+        with recorder.stage("inner"):
+            bytearray(2**20)
+        assert tracemalloc.is_tracing()
+        del block
+    inner, outer = recorder.records
+    assert inner["peak_mb"] is None
+    assert outer["peak_mb"] >= 4 and not tracemalloc.is_tracing()
@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+from benchmarks.generate_boss import boss_workbook
+from eopd.jobs import JobQueue
+
+@pytest.fixture(scope="module")
+def workbook(tmp_path_factory):
+    with open(boss_workbook(60, tmp_path_factory.mktemp("boss")), "rb") as f:
+        return f.read()
+
+def wait(queue, job_id):
+    job = queue.get(job_id)
+    while not job.finished:
+        time.sleep(0.02)
+    return job
+
+def run_jobs(queue, workbook, n):
+    return [wait(queue, queue.submit(["boss.xlsx"], [workbook], 10)).id for _ in range(n)]
+
+def test_finished_jobs_bounded_by_bytes(workbook):
+    queue = JobQueue(max_workers=1, max_bytes=1)
+    try:
+        first, second = run_jobs(queue, workbook, 2)
+        assert queue.get(first) is None  # Evicted when the second finished
+        job = queue.get(second)
+        assert job.status == "done" and job.nbytes > 0  # Kept although over max_bytes on its own
+    finally:
+        queue.shutdown()
+
+def test_finished_jobs_bounded_by_age(workbook):
+    queue = JobQueue(max_workers=1, max_age=0)
+    try:
+        first, second = run_jobs(queue, workbook, 2)
+        assert queue.get(first) is None and queue.get(second) is not None
+    finally:
+        queue.shutdown()
+
+def test_remove_drops_finished_jobs(workbook):
+    queue = JobQueue(max_workers=1)
+    try:
+        first, second = run_jobs(queue, workbook, 2)
+        queue.remove([first])
+        assert queue.get(first) is None and queue.get(second) is not None
+    finally:
+        queue.shutdown()
+
+def test_broken_pool_is_replaced(workbook):
+    queue = JobQueue(max_workers=2)
+    try:
+        first = wait(queue, queue.submit(["boss.xlsx"], [workbook], 10))
+        assert first.status == "done"
+        for process in list(queue._executor._processes.values()):
+            process.kill()  # As if killed for memory
+        while not queue._executor._broken:
+            time.sleep(0.02)
+        job = wait(queue, queue.submit(["boss.xlsx"], [workbook], 10))
+        assert job.status == "done"
+    finally:
+        queue.shutdown()
+
+def test_files_not_queued_fail_the_job(workbook):
+    queue = JobQueue(max_workers=1)
+    try:
+        job = wait(queue, queue.submit(["boss.xlsx", "broken", "boss2.xlsx"], [workbook, None, workbook], 10))
+        assert job.status == "failed"
+        assert job.results[0] is not None and job.errors[0] is None
+        assert job.errors[1].startswith("TypeError") and job.errors[2] == job.errors[1]
+    finally:
+        queue.shutdown()
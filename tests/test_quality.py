@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+
+from eopd.quality import apply_rules, rules_from_table, rules_table
+
+REPORTS = pd.DataFrame({
+    "Report Type": ["Noon", "Noon", "Arrival", None],
+    "Sea State (R)": [2, 5, 3, 4],
+    "BF (Rep)": [3.0, 7.0, np.nan, 4.0],
+})
+
+# One enabled rule, as edited in the rules table
+def table_rule(**values):
+    table = rules_table([{"name": "Rule", "kind": "allowed", "column": "Report Type", "values": ["Noon"]}])
+    for column, value in values.items():
+        table.loc[0, column] = value
+    return rules_from_table(table)
+
+def test_allowed_values_on_text_column():
+    kept, summary = apply_rules(REPORTS, table_rule())
+    assert kept.index.tolist() == [0, 1, 3]  # Missing passes by default
+    assert summary["Rejected"].tolist() == [1]
+
+def test_allowed_values_on_numeric_column():
+    rules = table_rule(Column="Sea State (R)", **{"Allowed Values": "2, 3, 4.0"})
+    assert rules[0]["values"] == ["2", "3", "4.0"]
+    kept, _ = apply_rules(REPORTS, rules)
+    assert kept.index.tolist() == [0, 2, 3]
+
+    kept, _ = apply_rules(REPORTS.astype({"Sea State (R)": float}), [{"kind": "allowed", "column": "Sea State (R)", "values": [5]}])
+    assert kept.index.tolist() == [1]
@@ -0,0 +1,31 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from eopd.boss import BOSS_OUTPUT_COLUMNS, BOSS_TEXT_COLUMNS
+from eopd.store import append_reports, list_partitions, load_reports
+
+# n cleaned reports of one vessel, a day apart from start
+def reports(start, n):
+    df = pd.DataFrame({col: "x" if col in BOSS_TEXT_COLUMNS else np.arange(n, dtype=float) for col in BOSS_OUTPUT_COLUMNS})
+    df["Vessel Name"] = "Ocean Pioneer"
+    df["Date/Time"] = pd.date_range(start, periods=n, freq="h")
+    return df
+
+def append_batch(root, start):
+    return append_reports(reports(start, 24), root)
+
+def test_appends_replace_same_date_time(tmp_path):
+    append_reports(reports("2024-01-01", 10), tmp_path)
+    append_reports(reports("2024-01-01 05:00", 10).assign(SOG=99.0), tmp_path)
+    stored = load_reports(tmp_path)
+    assert len(stored) == 15 and (stored["SOG"].iloc[5:] == 99).all()
+    assert list_partitions(tmp_path).values.tolist() == [["Ocean Pioneer", "2024-01"]]
+
+def test_appends_from_several_processes_are_all_kept(tmp_path):
+    starts = [f"2024-01-{day:02d}" for day in range(1, 17)]
+    with ProcessPoolExecutor(4, mp_context=multiprocessing.get_context("spawn")) as executor:
+        assert sum(executor.map(append_batch, [tmp_path] * len(starts), starts)) == 16 * 24
+    assert len(load_reports(tmp_path)) == 16 * 24
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from eopd.wind import DATASET_COLUMNS, add_position_course, calculate_relative_wind, calculate_true_wind, calculate_true_wind_dataset
+
+rng = np.random.default_rng(0)
+TRUE_SPEED = rng.uniform(0, 60, 500)
+TRUE_DIR = rng.uniform(0, 360, 500)
+STW = rng.uniform(0, 25, 500)
+HEADING = rng.uniform(0, 360, 500)
+
+def angle_difference(a, b):
+    return np.abs((a - b + 180) % 360 - 180)
+
+def test_true_relative_true_round_trip():
+    rel_speed, rel_dir = calculate_relative_wind(TRUE_SPEED, TRUE_DIR, STW, HEADING)
+    speed, direction = calculate_true_wind(rel_speed, rel_dir, STW, HEADING)
+    np.testing.assert_allclose(speed, TRUE_SPEED, atol=1e-9)
+    calm = TRUE_SPEED < 1e-6  # Direction of no wind is arbitrary
+    assert angle_difference(direction, TRUE_DIR)[~calm].max() < 1e-6
+
+def test_head_wind_off_the_bow():
+    # 20 kts true from the north, ship heading east at 10 kts
+    rel_speed, rel_dir = calculate_relative_wind(20, 0, 10, 90)
+    speed, direction = calculate_true_wind(rel_speed, rel_dir, 10, 90)
+    assert np.isclose(rel_speed, np.hypot(20, 10))
+    assert np.isclose(rel_dir, 360 - np.degrees(np.arctan2(20, 10)))
+    assert np.isclose(speed, 20) and angle_difference(direction, 0) < 1e-9
+
+def test_dataset_matches_single_values():
+    df = pd.DataFrame({"Wind Dir (R) (Rep)": [30.0, 200.0], "BF (Rep)": [20.0, 35.0], "STW (Rep)": [12.0, 9.5], "Heading": [45.0, 300.0]})
+    result = calculate_true_wind_dataset(df, {**DATASET_COLUMNS, "heading": "Heading"}, wind_speed_input="knots")
+    speed, direction = calculate_true_wind(df["BF (Rep)"].to_numpy(), df["Wind Dir (R) (Rep)"].to_numpy(), df["STW (Rep)"].to_numpy(), df["Heading"].to_numpy())
+    np.testing.assert_allclose(result["True Wind Speed (kts)"], np.round(speed, 1))
+    np.testing.assert_allclose(result["True Wind Dir"], np.round(direction, 0))
+
+def test_position_course_stands_in_for_heading():
+    df = pd.DataFrame({
+        "Vessel Name": "A", "Voyage No": ["1", "1", "1", "2"],
+        "Date/Time": pd.date_range("2024-01-01", periods=4),
+        "Lat": ["00 00.0 N", "02 00.0 N", "02 00.0 N", "10 00.0 S"],
+        "Long": ["000 00.0 E", "000 00.0 E", "002 00.0 E", "010 00.0 W"],
+    })
+    course = add_position_course(df)["Course (Pos)"]
+    assert course.isna().tolist() == [True, False, False, True]  # First report of each voyage
+    assert course[1] == 0 and course[2] == 90